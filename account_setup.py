@@ -1,8 +1,9 @@
 import streamlit as st
-from openai import OpenAI
 
-# Initialize the OpenAI client
-client = OpenAI(api_key=st.secrets["openai"]["api_key"])
+from instrumentation import render_debug_panel, start_rerun
+from llm import chat_completion
+
+start_rerun()
 
 # Function to call ChatGPT
 def generate_strategy(business_details, social_media_goals):
@@ -25,7 +26,7 @@ def generate_strategy(business_details, social_media_goals):
         """
 
         # Call the OpenAI ChatGPT API
-        response = client.chat.completions.create(
+        response = chat_completion(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": "You are a social media strategist specializing in Instagram."},
@@ -89,3 +90,5 @@ if submitted:
     # Display the strategy
     st.subheader("Generated Strategy")
     st.text(strategy)
+
+render_debug_panel()
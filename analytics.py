@@ -0,0 +1,314 @@
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta
+
+# pandas period aliases for the supported bucket granularities
+GRANULARITIES = {
+    "day": "D",
+    "week": "W",
+    "month": "M",
+}
+
+
+def count_posts_by_period(post_data, start=None, end=None, granularity="day"):
+    """
+    Count posts per calendar bucket in a single pass.
+
+    Args:
+        post_data (pd.DataFrame): Posts with a `created_time` column.
+        start (date, optional): First day of the window. Defaults to the first post.
+        end (date, optional): Last day of the window. Defaults to the last post.
+        granularity (str): One of "day", "week" or "month".
+
+    Returns:
+        pd.Series: Post counts indexed by period, with 0 for buckets without posts.
+    """
+    freq = GRANULARITIES[granularity]
+    buckets = to_calendar_days(post_data["created_time"]).dt.to_period(freq)
+    counts = buckets.value_counts()
+
+    if start is None or end is None:
+        if buckets.empty:
+            return pd.Series(dtype="int64", name="post_count")
+        start = buckets.min().start_time if start is None else start
+        end = buckets.max().start_time if end is None else end
+
+    full_range = pd.period_range(pd.Period(start, freq), pd.Period(end, freq), freq=freq)
+    return counts.reindex(full_range, fill_value=0).rename("post_count")
+
+
+def get_daily_post_counts(post_data, account_data, window_days=30, end=None, granularity="day"):
+    """
+    Attach the number of posts per bucket to each account row.
+
+    Args:
+        post_data (pd.DataFrame): Posts with a `created_time` column.
+        account_data (pd.DataFrame): Daily account metrics with a `date` column.
+        window_days (int, optional): Days before `end` to count; None counts all history.
+        end (date, optional): Last day of the window. Defaults to yesterday.
+        granularity (str): One of "day", "week" or "month".
+
+    Returns:
+        pd.DataFrame: account_data with a `post_count` column, NaN outside the window.
+    """
+    merged_df = account_data.copy()
+    merged_df['date'] = pd.to_datetime(merged_df['date']).dt.date
+
+    if end is None:
+        end = (datetime.today() - timedelta(days=1)).date()
+    start = end - timedelta(days=window_days) if window_days is not None else None
+    if start is None and not merged_df.empty:
+        # Cover the account history as well as the post history
+        first_post = pd.to_datetime(post_data['created_time']).min()
+        start = min(merged_df['date'].min(), first_post.date()) if pd.notna(first_post) else merged_df['date'].min()
+
+    counts = count_posts_by_period(post_data, start=start, end=end, granularity=granularity)
+
+    account_buckets = pd.to_datetime(merged_df['date']).dt.to_period(GRANULARITIES[granularity])
+    merged_df['post_count'] = account_buckets.map(counts)
+
+    return merged_df
+
+
+# Posts page filters, applied to posts with a datetime64 `created_time`
+def filter_last_30_days(df):
+    cutoff = pd.Timestamp(date.today() - timedelta(days=30))
+    return df[to_calendar_days(df["created_time"]) >= cutoff].sort_values(by="created_time", ascending=False)
+
+
+def filter_last_6_months(df):
+    cutoff = pd.Timestamp(date.today() - timedelta(days=182))  # Approx. 6 months
+    return df[to_calendar_days(df["created_time"]) >= cutoff].sort_values(by="created_time", ascending=False)
+
+
+def top_10_by_column(df, column):
+    return df.sort_values(by=column, ascending=False).head(10)
+
+
+# Windows (in days) offered for the period-over-period scorecards
+METRIC_WINDOWS = [7, 14, 30, 90, 365]
+
+# Daily totals summed from the account and post tables: (output, source column)
+ACCOUNT_DAILY_COLUMNS = [("followers_gained", "follower_count"), ("reach", "reach")]
+POST_DAILY_COLUMNS = [("likes", "like_count"), ("comments", "comments_count")]
+
+# Totals kept per page and day in the daily rollup table, defined the same way
+ROLLUP_ACCOUNT_COLUMNS = ACCOUNT_DAILY_COLUMNS + [("impressions", "impressions")]
+ROLLUP_POST_COLUMNS = POST_DAILY_COLUMNS + [("saves", "saved"), ("post_reach", "reach")]
+
+
+def build_daily_metrics(account_data, post_data, account_columns=ACCOUNT_DAILY_COLUMNS,
+                        post_columns=POST_DAILY_COLUMNS):
+    """
+    Collapse the account and post tables into one row per calendar day.
+
+    Args:
+        account_data (pd.DataFrame): Daily account metrics with a `date` column.
+        post_data (pd.DataFrame): Posts with a `created_time` column.
+        account_columns (list[tuple]): (output, source column) sums from account_data.
+        post_columns (list[tuple]): (output, source column) sums from post_data.
+
+    Returns:
+        pd.DataFrame: posts, followers_gained, reach, likes and comments per day,
+        indexed by a sorted DatetimeIndex.
+    """
+    account_days = to_calendar_days(account_data['date'])
+    account_daily = pd.DataFrame(index=pd.DatetimeIndex(account_days.unique()))
+    for name, column in account_columns:
+        if column in account_data:
+            account_daily[name] = account_data[column].groupby(account_days).sum()
+        else:
+            account_daily[name] = 0
+
+    post_days = to_calendar_days(post_data['created_time'])
+    post_daily = post_days.value_counts().rename("posts").to_frame()
+    for name, column in post_columns:
+        if column in post_data:
+            post_daily[name] = post_data[column].groupby(post_days).sum()
+        else:
+            post_daily[name] = 0
+
+    dtypes = {**account_daily.dtypes.to_dict(), **post_daily.dtypes.to_dict()}
+    daily = account_daily.join(post_daily, how="outer").fillna(0)
+    return daily.astype(dtypes).sort_index()
+
+
+def build_daily_rollup(account_data, post_data):
+    """
+    Compute daily rollup rows from the raw account and post tables.
+
+    Produces what refresh_rollup.py merges into the rollup table, for
+    accounts the job has not covered yet.
+
+    Returns:
+        pd.DataFrame: A `date` column, the ROLLUP_*_COLUMNS totals and the
+        day's `total_followers`. Account metrics are missing on days without
+        an account row, like the table's NULLs.
+    """
+    daily = build_daily_metrics(account_data, post_data, ROLLUP_ACCOUNT_COLUMNS, ROLLUP_POST_COLUMNS)
+    account_days = to_calendar_days(account_data['date'])
+    post_only = ~daily.index.isin(account_days)
+    for name, _ in ROLLUP_ACCOUNT_COLUMNS:
+        daily[name] = daily[name].astype("Int64").mask(post_only)
+    if 'total_followers' in account_data:
+        daily['total_followers'] = account_data['total_followers'].groupby(account_days).max()
+    return daily.rename_axis('date').reset_index()
+
+
+def rollup_account_days(rollup):
+    """Rollup rows for days with an account row, i.e. the account table's history."""
+    names = [name for name, _ in ROLLUP_ACCOUNT_COLUMNS] + ["total_followers"]
+    return rollup[rollup[[name for name in names if name in rollup]].notna().any(axis=1)]
+
+
+def rollup_daily_metrics(rollup):
+    """
+    Turn daily rollup rows into the input of generate_ig_metrics_windows.
+
+    Args:
+        rollup (pd.DataFrame): Rows of the rollup table or build_daily_rollup.
+
+    Returns:
+        pd.DataFrame: Same columns and index as build_daily_metrics.
+    """
+    columns = ["posts"] + [name for name, _ in ACCOUNT_DAILY_COLUMNS + POST_DAILY_COLUMNS]
+    daily = rollup.set_index(pd.DatetimeIndex(to_calendar_days(rollup['date'])))[columns]
+    return daily.rename_axis(None).fillna(0).astype("int64").sort_index()
+
+
+def to_calendar_days(values):
+    days = pd.to_datetime(values).dt.normalize()
+    return days.dt.tz_localize(None) if days.dt.tz is not None else days
+
+
+def _window_sums(cumulative, starts, ends):
+    # Sum of each column over [start, end] as C(end) - C(start - 1) on the cumulative index
+    dates = cumulative.index.values
+    end_pos = np.searchsorted(dates, ends.values, side="right")
+    start_pos = np.searchsorted(dates, starts.values, side="left")
+
+    sums = {}
+    for column in cumulative.columns:
+        values = np.concatenate([[0], cumulative[column].to_numpy()])
+        sums[column] = values[end_pos] - values[start_pos]
+    return pd.DataFrame(sums)
+
+
+def _metrics_from_sums(sums):
+    total_posts = sums['posts']
+    total_reach = sums['reach']
+    total_likes = sums['likes']
+    return pd.DataFrame({
+        'Total Posts': total_posts,
+        'Followers Gained': sums['followers_gained'],
+        'Total Reach': total_reach,
+        'Total Likes': total_likes,
+        'Total Comments': sums['comments'],
+        'Like Rate': (total_likes / total_reach).where(total_reach > 0, 0.0),
+        'Average Reach': (total_reach / total_posts).where(total_posts > 0, 0.0),
+        'Average Likes': (total_likes / total_posts).where(total_posts > 0, 0.0),
+    })
+
+
+def generate_ig_metrics_windows(windows, daily_metrics, today=None):
+    """
+    Compute Instagram metrics for several windows and their previous periods at once.
+
+    Each window covers the `window` days up to and including `today`; the previous
+    period is the same number of days immediately before it. Posts are bucketed
+    by calendar day, like the account table.
+
+    Args:
+        windows (list[int]): Window lengths in days.
+        daily_metrics (pd.DataFrame): Output of build_daily_metrics.
+        today (date, optional): Last day of the current period. Defaults to today.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: Current and previous period metrics,
+        one row per window, indexed by window length.
+    """
+    today = pd.Timestamp(today if today is not None else datetime.today()).normalize()
+    lengths = pd.to_timedelta(pd.Series(windows, dtype="int64"), unit="D")
+
+    cumulative = daily_metrics.cumsum()
+    current_start = today - lengths
+    previous_start = current_start - lengths
+    previous_end = current_start - pd.Timedelta(days=1)
+
+    current_df = _metrics_from_sums(_window_sums(cumulative, current_start, pd.Series(today, index=lengths.index)))
+    previous_df = _metrics_from_sums(_window_sums(cumulative, previous_start, previous_end))
+
+    index = pd.Index(windows, name="window")
+    return current_df.set_index(index), previous_df.set_index(index)
+
+
+def generate_ig_metrics(time_frame, account_data, post_data):
+    """
+    Generate Instagram metrics for a given time frame and the previous period.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame]: Single-row current and previous period metrics.
+    """
+    daily_metrics = build_daily_metrics(account_data, post_data)
+    current_df, previous_df = generate_ig_metrics_windows([time_frame], daily_metrics)
+    return current_df.reset_index(drop=True), previous_df.reset_index(drop=True)
+
+
+def calculate_percentage_diff_df(current_df, previous_df):
+    """
+    Calculate the percentage difference between two DataFrames, row by row.
+
+    Values are 0 where current equals previous, None where either value is
+    missing or the previous value is 0, and otherwise rounded to 2 decimals.
+
+    Args:
+        current_df (pd.DataFrame): Current period values.
+        previous_df (pd.DataFrame): Previous period values, same shape and columns.
+
+    Returns:
+        pd.DataFrame: Object-dtype percentage differences indexed like current_df.
+    """
+    # Ensure the two DataFrames have the same structure
+    if not current_df.columns.equals(previous_df.columns):
+        raise ValueError("Both DataFrames must have the same columns.")
+    if current_df.shape != previous_df.shape:
+        raise ValueError("Both DataFrames must have the same number of rows.")
+
+    # Convert all columns to numeric, coercing errors to NaN
+    current = current_df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype="float64")
+    previous = previous_df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype="float64")
+
+    missing = np.isnan(current) | np.isnan(previous)
+    equal = ~missing & (current == previous)
+    invalid = missing | (~equal & (previous == 0))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        diff = np.round((current - previous) / previous * 100, 2)
+
+    result = diff.astype(object)
+    result[equal] = 0
+    result[invalid] = None
+
+    return pd.DataFrame(result, index=current_df.index, columns=current_df.columns)
+
+
+def generate_static_summary(last_period_df, percentage_diff_df):
+        
+    #Generate a static summary string from the last period data and percentage differences.
+    summary_lines = []
+
+    for column in last_period_df.columns:
+        # Get the last period value and percentage difference
+        last_period_value = last_period_df[column].iloc[0]  # Assuming one row
+        percentage_diff = percentage_diff_df[column].iloc[0]
+
+        # Format the percentage difference with a "+" for positive values
+        diff_string = f"{percentage_diff:+.2f}%" if percentage_diff is not None else "N/A"
+
+        # Create a description line
+        summary_lines.append(
+            f"{column}: {last_period_value:,} ({diff_string} from the previous period)"
+        )
+
+    # Combine all lines into a single string
+    return "\n".join(summary_lines)
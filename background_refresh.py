@@ -0,0 +1,130 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+from instrumentation import record
+
+# Seconds between change checks of each dataset
+REFRESH_CHECK_SECONDS = 60
+
+# Datasets nobody has read for this long are dropped instead of refreshed
+REFRESH_IDLE_SECONDS = 60 * 60
+
+
+@dataclass
+class _Dataset:
+    load: callable
+    version: callable
+    max_age: float
+    tables: tuple
+    value: object = None
+    token: object = None
+    loaded_at: float = 0.0
+    checked_at: float = 0.0
+    last_read: float = field(default_factory=time.monotonic)
+
+
+class BackgroundRefresher:
+    """
+    Serve the last good copy of each dataset and refresh it in the background.
+
+    Only the first read of a dataset waits for `load`. After that, reads
+    return the current copy immediately. A worker thread checks every
+    dataset's `version` each `check_interval` seconds. When the version has
+    changed, or the copy is older than `max_age`, it reloads the dataset and
+    swaps the new copy in. A failed refresh keeps the previous copy.
+
+    Args:
+        check_interval (float): Seconds between version checks of a dataset.
+        idle_after (float): Seconds without reads after which a dataset is dropped.
+    """
+
+    def __init__(self, check_interval=REFRESH_CHECK_SECONDS, idle_after=REFRESH_IDLE_SECONDS):
+        self.check_interval = check_interval
+        self.idle_after = idle_after
+        self._datasets = {}
+        self._lock = threading.Lock()
+
+        # Per dataset: message of the last failed refresh, cleared once one succeeds
+        self.errors = {}
+
+        threading.Thread(target=self._run, name="background-refresh", daemon=True).start()
+
+    def get(self, key, load, version, max_age, tables=()):
+        """
+        Return the current copy of a dataset, loading it on first use.
+
+        Args:
+            key (hashable): Identifies the dataset.
+            load (callable): load() returns the dataset.
+            version (callable): version() returns a cheap token that changes
+                with the data, e.g. a table's modification time and row count.
+            max_age (float): Seconds after which the dataset is reloaded anyway.
+            tables (tuple[str]): Tables it reads, for expire().
+        """
+        now = time.monotonic()
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is not None:
+                dataset.last_read = now
+                return dataset.value
+
+        dataset = _Dataset(load, version, max_age, tuple(tables))
+        dataset.token = self._version(key, dataset)
+        dataset.value = load()
+        dataset.loaded_at = dataset.checked_at = time.monotonic()
+        with self._lock:
+            self._datasets.setdefault(key, dataset)
+            return self._datasets[key].value
+
+    def expire(self, table):
+        """Forget every dataset read from `table`, so the next read loads it afresh."""
+        with self._lock:
+            for key in [key for key, dataset in self._datasets.items() if table in dataset.tables]:
+                del self._datasets[key]
+
+    def _version(self, key, dataset):
+        # A failed check returns None, which never equals a real token and forces a reload
+        try:
+            return dataset.version()
+        except Exception as e:
+            self.errors[key] = str(e)
+            return None
+
+    def _refresh(self, key, dataset):
+        start = time.perf_counter()
+        token = self._version(key, dataset)
+        dataset.checked_at = time.monotonic()
+        if token is not None and token == dataset.token and dataset.checked_at - dataset.loaded_at < dataset.max_age:
+            return
+
+        try:
+            value = dataset.load()
+        except Exception as e:
+            self.errors[key] = str(e)
+            return
+
+        with self._lock:
+            # An expired dataset was removed after a write; its reload happens on the next read
+            if self._datasets.get(key) is not dataset:
+                return
+            self._datasets[key] = _Dataset(
+                dataset.load, dataset.version, dataset.max_age, dataset.tables,
+                value=value, token=token, loaded_at=time.monotonic(),
+                checked_at=dataset.checked_at, last_read=dataset.last_read,
+            )
+        self.errors.pop(key, None)
+        record("refresh", str(key), time.perf_counter() - start)
+
+    def _run(self):
+        while True:
+            time.sleep(min(self.check_interval, 5))
+            now = time.monotonic()
+            with self._lock:
+                for key in [key for key, dataset in self._datasets.items() if now - dataset.last_read > self.idle_after]:
+                    del self._datasets[key]
+                due = [(key, dataset) for key, dataset in self._datasets.items()
+                       if now - dataset.checked_at >= self.check_interval]
+
+            for key, dataset in due:
+                self._refresh(key, dataset)
@@ -0,0 +1,79 @@
+"""
+Report the memory each session's post and account frames take.
+
+Compares the layout BigQuery returns by default with typed_frames' compact
+layout, for the frames a session holds on the Overview and Posts pages.
+Run from the repository root:
+
+    python -m benchmarks.memory_report [--sizes 1000 100000] [--json FILE]
+"""
+import argparse
+import json
+
+from benchmarks.synthetic import make_account_data, make_post_data
+from typed_frames import compact_frame, frame_memory
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000]
+
+
+def default_frames(n_rows):
+    """Account and post tables in the dtypes to_dataframe() returns, plus the Posts page's copy."""
+    account_data = make_account_data(n_rows)
+    post_data = make_post_data(n_rows)
+    posts_page = post_data.assign(
+        created_time=post_data["created_time"].dt.date,
+        **{"Like Rate": round(post_data["like_count"] / post_data["reach"] * 100, 2)},
+    )
+    return {"account_data": account_data, "post_data": post_data, "posts_page": posts_page}
+
+
+def compact_frames(frames):
+    """The same frames as load_table and the Posts page now hold them."""
+    posts_page = compact_frame(frames["post_data"])
+    posts_page["Like Rate"] = (posts_page["like_count"] / posts_page["reach"] * 100).round(2).astype("float32")
+    return {
+        "account_data": compact_frame(frames["account_data"]),
+        "post_data": compact_frame(frames["post_data"]),
+        "posts_page": posts_page,
+    }
+
+
+def run(sizes):
+    results = []
+    for n_rows in sizes:
+        before = default_frames(n_rows)
+        after = compact_frames(before)
+        for name in before:
+            result = {
+                "frame": name,
+                "rows": n_rows,
+                "default_bytes": frame_memory(before[name]),
+                "compact_bytes": frame_memory(after[name]),
+            }
+            results.append(result)
+            print(f"{name:<14} {n_rows:>9,} rows  {result['default_bytes'] / 2**20:>9.2f} MiB"
+                  f" -> {result['compact_bytes'] / 2**20:>8.2f} MiB"
+                  f"  ({1 - result['compact_bytes'] / result['default_bytes']:.0%} saved)")
+
+        total_before = sum(frame_memory(frame) for frame in before.values())
+        total_after = sum(frame_memory(frame) for frame in after.values())
+        print(f"{'per session':<14} {n_rows:>9,} rows  {total_before / 2**20:>9.2f} MiB"
+              f" -> {total_after / 2**20:>8.2f} MiB  ({1 - total_after / total_before:.0%} saved)")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Rows per synthetic table.")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE for comparison.")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Time the analytics functions on synthetic post and account tables.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks [--sizes 1000 100000 1000000] [--repeat 3] [--only NAME] [--json FILE]
+
+Each case reports the best wall-clock time over --repeat runs and the peak
+memory allocated by a separate, traced run.
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from analytics import (
+    calculate_percentage_diff_df,
+    filter_last_30_days,
+    generate_ig_metrics,
+    generate_static_summary,
+    get_daily_post_counts,
+    top_10_by_column,
+)
+from benchmarks.synthetic import make_account_data, make_post_data
+from typed_frames import compact_frame
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+METRIC_COLUMNS = [
+    "Total Posts", "Followers Gained", "Total Reach", "Total Likes",
+    "Total Comments", "Like Rate", "Average Reach", "Average Likes",
+]
+
+
+def make_metric_frames(n_rows, seed=0):
+    # Period metrics with some zero and missing previous values, as calculate_percentage_diff_df sees
+    rng = np.random.default_rng(seed)
+    current = pd.DataFrame(rng.gamma(2.0, 100.0, (n_rows, len(METRIC_COLUMNS))), columns=METRIC_COLUMNS)
+    previous = pd.DataFrame(rng.gamma(2.0, 100.0, (n_rows, len(METRIC_COLUMNS))), columns=METRIC_COLUMNS)
+    previous = previous.mask(rng.random(previous.shape) < 0.05, 0.0)
+    previous = previous.mask(rng.random(previous.shape) < 0.01)
+    return current, previous
+
+
+def build_inputs(n_rows):
+    """Generate every table the cases need for one size."""
+    account_data = make_account_data(n_rows)
+    post_data = make_post_data(n_rows)
+
+    # The Posts page filters posts in their compact, caption-free layout
+    compact_posts = compact_frame(post_data)
+
+    current, previous = make_metric_frames(n_rows)
+    igmetrics, previous_period = generate_ig_metrics(7, account_data, post_data)
+    return {
+        "account_data": account_data,
+        "post_data": post_data,
+        "compact_posts": compact_posts,
+        "current": current,
+        "previous": previous,
+        "igmetrics": igmetrics,
+        "perdiff": calculate_percentage_diff_df(igmetrics, previous_period),
+    }
+
+
+CASES = {
+    "get_daily_post_counts": lambda d: get_daily_post_counts(d["post_data"], d["account_data"]),
+    "generate_ig_metrics": lambda d: generate_ig_metrics(30, d["account_data"], d["post_data"]),
+    "calculate_percentage_diff_df": lambda d: calculate_percentage_diff_df(d["current"], d["previous"]),
+    "generate_static_summary": lambda d: generate_static_summary(d["igmetrics"], d["perdiff"]),
+    "filter_last_30_days": lambda d: filter_last_30_days(d["compact_posts"]),
+    "top_10_by_column": lambda d: top_10_by_column(d["post_data"], "reach"),
+}
+
+
+def measure(case, inputs, repeat):
+    """
+    Time one case and record its peak traced allocation.
+
+    Returns:
+        tuple[float, float]: Best seconds over `repeat` runs and peak MiB.
+    """
+    # Timed runs are untraced, since tracemalloc slows allocation-heavy code
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case(inputs)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        case(inputs)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / (1024 * 1024)
+
+
+def run(sizes, repeat, only=None):
+    results = []
+    for n_rows in sizes:
+        inputs = build_inputs(n_rows)
+        for name, case in CASES.items():
+            if only and name not in only:
+                continue
+            seconds, peak_mib = measure(case, inputs, repeat)
+            results.append({"function": name, "rows": n_rows, "seconds": seconds, "peak_mib": peak_mib})
+            print(f"{name:<30} {n_rows:>10,} rows  {seconds * 1000:>10.2f} ms  {peak_mib:>9.2f} MiB", flush=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Rows per synthetic table.")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case.")
+    parser.add_argument("--only", action="append", choices=sorted(CASES),
+                        help="Only run this function (repeatable).")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE for comparison.")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.only)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Fill the local DuckDB backend with synthetic data for every configured account.
+
+Run from the repository root, then start a page with DATA_BACKEND=local:
+
+    python -m benchmarks.seed_local_backend [--posts 1000] [--days 365] [--ideas 10] [--database FILE]
+"""
+import argparse
+import json
+from datetime import date, timedelta
+
+import pandas as pd
+
+from analytics import build_daily_rollup
+from benchmarks.synthetic import make_account_data, make_post_data
+from data_access import ACCOUNTS, ROLLUP_COLUMNS, TABLE_DATASETS, config, table_ref
+from local_backend import DEFAULT_DATABASE, LocalClient
+
+BUSINESS_DESCRIPTION = "A mental performance coaching practice growing its Instagram audience of athletes."
+
+SUMMARY = (
+    "• Reach and likes held steady over the last week. "
+    "• Posting more often, especially Reels, should lift engagement further."
+)
+
+
+def make_post_ideas(n_ideas, start=None):
+    start = start or date.today() + timedelta(days=1)
+    return pd.DataFrame({
+        "Date": [start + timedelta(days=3 * i) for i in range(n_ideas)],
+        "caption": [f"Synthetic post idea {i}" for i in range(n_ideas)],
+        "post_type": ["Reel", "Story", "Static Post"] * (n_ideas // 3) + ["Reel"] * (n_ideas % 3),
+        "themes": [json.dumps(["mindset", "performance"])] * n_ideas,
+        "tone": ["Motivational"] * n_ideas,
+        "source": ["AI"] * n_ideas,
+    })
+
+
+def account_tables(account, n_posts, n_days, n_ideas, seed):
+    """Synthetic rows for each table of one account, keyed by config table key."""
+    page_id = account["PAGE_ID"]
+    posts = make_post_data(n_posts, seed=seed).assign(page_id=page_id)
+    account_days = make_account_data(n_days, seed=seed).assign(page_id=page_id)
+    # The rollup as refresh_rollup.py would leave it
+    rollup = build_daily_rollup(account_days, posts)
+    rollup = rollup.assign(page_id=page_id, date=rollup["date"].dt.date).astype({name: "Int64" for name in ROLLUP_COLUMNS})
+    tables = {
+        "POST_TABLE_ID": posts,
+        "ACCOUNT_TABLE_ID": account_days,
+        "ROLLUP_TABLE_ID": rollup[["page_id", "date"] + ROLLUP_COLUMNS],
+        "IDEAS_TABLE_ID": make_post_ideas(n_ideas),
+        "BUSINESS_TABLE_ID": pd.DataFrame({"Description of Business and Instagram Goals": [BUSINESS_DESCRIPTION]}),
+        "SUMMARY_TABLE_ID": pd.DataFrame({"page_id": [page_id], "summary": [SUMMARY], "date": [date.today()]}),
+    }
+    if account.get("SHARED_TABLES"):
+        for key in ("IDEAS_TABLE_ID", "BUSINESS_TABLE_ID"):
+            tables[key]["page_id"] = page_id
+    return tables
+
+
+def seed(client, accounts, n_posts, n_days, n_ideas):
+    """Replace every configured table with synthetic rows."""
+    refs = {table_ref(account, key) for account in accounts for key in TABLE_DATASETS}
+    for ref in refs:
+        client.query(f"DROP TABLE IF EXISTS `{ref}`").result()
+
+    for seed_value, account in enumerate(accounts):
+        for key, rows in account_tables(account, n_posts, n_days, n_ideas, seed_value).items():
+            client.load_table_from_dataframe(rows, table_ref(account, key)).result()
+    return sorted(refs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1_000, help="Posts per account.")
+    parser.add_argument("--days", type=int, default=365, help="Days of account metrics per account.")
+    parser.add_argument("--ideas", type=int, default=10, help="Scheduled post ideas per account.")
+    parser.add_argument("--database", default=config.get("LOCAL_DATABASE", DEFAULT_DATABASE))
+    args = parser.parse_args(argv)
+
+    refs = seed(LocalClient(args.database), ACCOUNTS, args.posts, args.days, args.ideas)
+    print(f"Seeded {len(refs)} tables for {len(ACCOUNTS)} account(s) in {args.database}.")
+
+
+if __name__ == "__main__":
+    main()
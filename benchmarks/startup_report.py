@@ -0,0 +1,106 @@
+"""
+Measure each page's cold start and warm rerun against the local backend.
+
+Every page runs in a fresh interpreter under streamlit's AppTest, so the
+first run pays for imports, clients and initial queries just as a new
+Community Cloud container would. Run from the repository root after
+seeding the local database:
+
+    python -m benchmarks.seed_local_backend
+    python -m benchmarks.startup_report [--pages social_overview.py ...] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PAGES = [
+    "social_overview.py",
+    "post_overview.py",
+    "post_scheduler.py",
+    "account_setup.py",
+    "boosted_post_generator.py",
+]
+
+# Libraries worth knowing about when they are imported at startup
+HEAVY_MODULES = ["seaborn", "matplotlib", "openai", "google.cloud.bigquery", "duckdb", "PIL"]
+
+# AppTest needs secrets; the local backend and an unused API key make none of them real
+TEST_SECRETS = {"openai": {"api_key": "startup-report"}}
+
+
+def measure_page(page):
+    """Run `page` twice in this interpreter and report timings; called in a child process."""
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    framework_seconds = time.perf_counter() - start
+
+    app = AppTest.from_file(page, default_timeout=120)
+    for section, values in TEST_SECRETS.items():
+        app.secrets[section] = values
+
+    start = time.perf_counter()
+    app.run()
+    cold_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app.run()
+    warm_seconds = time.perf_counter() - start
+
+    return {
+        "page": page,
+        "framework_s": framework_seconds,
+        "cold_s": cold_seconds,
+        "warm_s": warm_seconds,
+        "exceptions": [exception.message for exception in app.exception],
+        "heavy_imports": [module for module in HEAVY_MODULES if module in sys.modules],
+    }
+
+
+def run_child(page):
+    env = {**os.environ, "DATA_BACKEND": "local"}
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup_report", "--child", page],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", nargs="+", default=PAGES)
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters per page.")
+    parser.add_argument("--json", metavar="FILE", help="Also write the results to FILE for comparison.")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure_page(args.child)))
+        return
+
+    results = []
+    print(f"{'page':<28} {'cold (s)':>9} {'warm (s)':>9}  heavy imports")
+    for page in args.pages:
+        runs = [run_child(page) for _ in range(args.repeat)]
+        result = {
+            "page": page,
+            "cold_s": statistics.median(run["cold_s"] for run in runs),
+            "warm_s": statistics.median(run["warm_s"] for run in runs),
+            "heavy_imports": runs[-1]["heavy_imports"],
+            "exceptions": runs[-1]["exceptions"],
+        }
+        results.append(result)
+        print(f"{page:<28} {result['cold_s']:>9.2f} {result['warm_s']:>9.2f}  {', '.join(result['heavy_imports']) or '-'}")
+        for message in result["exceptions"]:
+            print(f"  exception: {message}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
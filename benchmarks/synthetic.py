@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+
+# Days of history generated per account, about three years
+HISTORY_DAYS = 3 * 365
+
+MEDIA_TYPES = ["IMAGE", "VIDEO", "CAROUSEL_ALBUM"]
+
+
+def _page_ids(n_accounts):
+    return [str(17841400000000000 + i) for i in range(n_accounts)]
+
+
+def make_account_data(n_rows, end=None, seed=0):
+    """
+    Generate a daily account table shaped like ACCOUNT_TABLE_ID.
+
+    Rows are one per account and day. Large tables hold several accounts,
+    as a shared table would, so no account needs more than HISTORY_DAYS.
+
+    Args:
+        n_rows (int): Number of rows to generate.
+        end (date, optional): Last day of history. Defaults to yesterday.
+        seed (int): Random seed, so runs are comparable.
+
+    Returns:
+        pd.DataFrame: date, follower_count, total_followers, reach, impressions and page_id.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or date.today() - timedelta(days=1)
+    n_accounts = -(-n_rows // HISTORY_DAYS)
+
+    days = pd.date_range(end=end, periods=min(n_rows, HISTORY_DAYS))
+    dates = np.tile(days.values, n_accounts)[:n_rows]
+    page_ids = np.repeat(_page_ids(n_accounts), len(days))[:n_rows]
+
+    follower_count = rng.poisson(3, n_rows)
+    reach = rng.gamma(2.0, 150.0, n_rows).astype("int64")
+    return pd.DataFrame({
+        "date": pd.Series(dates).dt.date,
+        "follower_count": follower_count,
+        "total_followers": pd.Series(follower_count).groupby(page_ids).cumsum().to_numpy() + 500,
+        "reach": reach,
+        "impressions": reach + rng.poisson(40, n_rows),
+        "page_id": page_ids,
+    })
+
+
+def make_post_data(n_rows, end=None, seed=0):
+    """
+    Generate a post table shaped like POST_TABLE_ID.
+
+    Posts are spread uniformly over HISTORY_DAYS, so larger tables simply
+    hold more posts per day.
+
+    Args:
+        n_rows (int): Number of posts to generate.
+        end (date, optional): Last day of history. Defaults to yesterday.
+        seed (int): Random seed, so runs are comparable.
+
+    Returns:
+        pd.DataFrame: created_time (UTC), caption, media_type, source, reach,
+        like_count, comments_count, saved and page_id.
+    """
+    rng = np.random.default_rng(seed)
+    end = end or date.today() - timedelta(days=1)
+    n_accounts = -(-n_rows // HISTORY_DAYS)
+
+    last_second = pd.Timestamp(end, tz="UTC") + pd.Timedelta(days=1)
+    offsets = rng.integers(0, HISTORY_DAYS * 24 * 60 * 60, n_rows)
+    created_time = last_second - pd.to_timedelta(offsets, unit="s")
+
+    reach = rng.gamma(2.0, 400.0, n_rows).astype("int64")
+    like_count = rng.binomial(reach, 0.05)
+    return pd.DataFrame({
+        "created_time": created_time,
+        "caption": [f"Synthetic caption {i} #mindset #performance" for i in range(n_rows)],
+        "media_type": pd.Series(rng.choice(MEDIA_TYPES, n_rows)),
+        "source": [f"https://example.com/media/{i}.jpg" for i in range(n_rows)],
+        "reach": reach,
+        "like_count": like_count,
+        "comments_count": rng.binomial(like_count, 0.1),
+        "saved": rng.binomial(like_count, 0.05),
+        "page_id": rng.choice(_page_ids(n_accounts), n_rows),
+    })
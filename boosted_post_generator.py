@@ -1,9 +1,19 @@
-from openai import OpenAI
 import streamlit as st
 
+from instrumentation import render_debug_panel, start_rerun
+from llm import chat_completion
+
 st.set_page_config(page_title="Post Brainstormer", layout="wide", page_icon = "💡")
+start_rerun()
+
+# Chat model used for replies and for summarizing older turns
+CHAT_MODEL = "gpt-3.5-turbo"
+
+# Approximate token budget for the history sent to the model on each turn
+CONTEXT_TOKEN_BUDGET = 3000
 
-openai_api_key = st.secrets["openai"]["api_key"]
+# Most recent messages that are always sent verbatim
+RECENT_MESSAGES = 6
 
 # Define links to other pages
 PAGES = {
@@ -38,6 +48,51 @@ if "messages" not in st.session_state:
         {"role": "assistant", "content": "How can I help you today?"}
     ]
 
+# Rough token count (about 4 characters per token) used to keep the prompt in budget
+def estimate_tokens(messages):
+    return sum(len(message["content"]) // 4 + 4 for message in messages)
+
+def summarize_messages(messages, previous_summary):
+    # Fold older turns into a short running summary of the conversation
+    transcript = "\n".join(f"{message['role']}: {message['content']}" for message in messages)
+    response = chat_completion(
+        model=CHAT_MODEL,
+        messages=[
+            {"role": "system", "content": "Summarize this brainstorming conversation in a few sentences, keeping decisions, ideas and open questions."},
+            {"role": "user", "content": f"Summary so far: {previous_summary or 'None'}\n\nNew messages:\n{transcript}"},
+        ],
+    )
+    return response.choices[0].message.content.strip()
+
+def build_context():
+    """
+    Return the messages to send: the system prompt, a rolling summary of older
+    turns and the most recent turns, kept within CONTEXT_TOKEN_BUDGET.
+    """
+    messages = st.session_state.messages
+    system_message = messages[0]
+    summary = st.session_state.get("history_summary", "")
+    summarized_upto = st.session_state.get("summarized_upto", 1)
+
+    def context(recent):
+        summary_message = [{"role": "system", "content": f"Summary of the earlier conversation: {summary}"}] if summary else []
+        return [system_message] + summary_message + recent
+
+    recent = messages[summarized_upto:]
+    if estimate_tokens(context(recent)) > CONTEXT_TOKEN_BUDGET and len(recent) > RECENT_MESSAGES:
+        overflow = recent[:-RECENT_MESSAGES]
+        summary = summarize_messages(overflow, summary)
+        summarized_upto += len(overflow)
+        st.session_state["history_summary"] = summary
+        st.session_state["summarized_upto"] = summarized_upto
+        recent = messages[summarized_upto:]
+
+    # Drop the oldest recent turns if a few long messages still exceed the budget
+    while estimate_tokens(context(recent)) > CONTEXT_TOKEN_BUDGET and len(recent) > 1:
+        recent = recent[1:]
+
+    return context(recent)
+
 # Display all previous messages, excluding system messages
 for msg in st.session_state.messages:
     if msg["role"] != "system":  # Skip displaying system messages
@@ -45,17 +100,19 @@ for msg in st.session_state.messages:
 
 # Handle new user inputs
 if prompt := st.chat_input():
-    client = OpenAI(api_key=openai_api_key)
     # Append the user's message
     st.session_state.messages.append({"role": "user", "content": prompt})
     st.chat_message("user").write(prompt)
 
-    # Send the full conversation history, including business context, to OpenAI
-    response = client.chat.completions.create(
-        model="gpt-3.5-turbo",
-        messages=st.session_state.messages
+    # Send the business context, a summary of older turns and the recent conversation
+    stream = chat_completion(
+        model=CHAT_MODEL,
+        messages=build_context(),
+        stream=True,
     )
-    msg = response.choices[0].message.content
+    # Render tokens as they arrive
+    msg = st.chat_message("assistant").write_stream(stream)
     # Append the assistant's response
     st.session_state.messages.append({"role": "assistant", "content": msg})
-    st.chat_message("assistant").write(msg)
+
+render_debug_panel()
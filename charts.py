@@ -0,0 +1,84 @@
+import io
+import pandas as pd
+import streamlit as st
+
+from analytics import to_calendar_days
+
+# Rendered charts kept per process
+CHART_CACHE_MAX_ENTRIES = 32
+
+
+def data_version(*frames):
+    """
+    Return a token that changes whenever the charted data changes.
+
+    Hashing is vectorized, so this is far cheaper than re-rendering a figure.
+    """
+    hashes = [str(pd.util.hash_pandas_object(frame, index=False).sum()) for frame in frames]
+    return "-".join(f"{len(frame)}:{frame_hash}" for frame, frame_hash in zip(frames, hashes))
+
+
+def prepare_metric_series(account_data, metric):
+    """
+    Daily values of `metric`, with missing days forward-filled.
+
+    Args:
+        account_data (pd.DataFrame): Account metrics with a `date` column.
+        metric (str): Column to chart.
+
+    Returns:
+        pd.Series: Metric values indexed by every day from first to last date.
+    """
+    series = (
+        account_data.assign(date=pd.to_datetime(account_data['date']))
+        .groupby('date')[metric]
+        .last()
+    )
+    full_date_range = pd.date_range(start=series.index.min(), end=series.index.max())
+    return series.reindex(full_date_range).ffill()
+
+
+@st.cache_data(max_entries=CHART_CACHE_MAX_ENTRIES, show_spinner=False)
+def render_metric_chart(metric, version, _account_data, _post_days):
+    """
+    Render the metric-over-time line chart as PNG bytes.
+
+    Results are cached by (metric, version); the frames are not hashed, so
+    callers must pass a `version` from data_version() that tracks them.
+
+    Returns:
+        bytes: The PNG image.
+    """
+    # Imported on first render only; matplotlib is the slowest import on this page
+    from matplotlib import style
+    from matplotlib.figure import Figure
+    from matplotlib.lines import Line2D
+
+    series = prepare_metric_series(_account_data, metric)
+
+    # Build the figure without pyplot so nothing stays registered after rendering
+    with style.context("seaborn-v0_8-whitegrid"):  # Set a friendly grid style
+        fig = Figure(figsize=(10, 6))
+        ax = fig.subplots()
+        ax.plot(series.index, series.values, color="royalblue", linewidth=2)
+
+        # Mark every day with a post in a single collection
+        post_days = to_calendar_days(_post_days).unique()
+        post_days = post_days[post_days >= series.index.min()]
+        ax.vlines(post_days, 0, 1, transform=ax.get_xaxis_transform(), colors='gray', linestyles='--', alpha=0.5)
+
+        # Add a single legend entry for posts
+        post_legend = Line2D([0], [0], color='gray', linestyle='--', lw=1, label='Days with Posts')
+        ax.legend(handles=[post_legend], loc='upper left')
+
+        # Customize the plot
+        ax.set_title(f'{metric} Over Time', fontsize=18, fontweight='bold')
+        ax.set_xlabel('Date', fontsize=12)
+        ax.set_ylabel(metric, fontsize=12)
+        ax.tick_params(axis='x', rotation=45)  # Rotate x-axis labels
+        ax.tick_params(axis='both', which='major', labelsize=10)
+        ax.grid(alpha=0.5)  # Adjust grid transparency
+
+        output = io.BytesIO()
+        fig.savefig(output, format="png", bbox_inches="tight")
+    return output.getvalue()
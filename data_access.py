@@ -0,0 +1,1000 @@
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+import json
+import os
+import threading
+import time
+import uuid
+
+from analytics import ROLLUP_ACCOUNT_COLUMNS, ROLLUP_POST_COLUMNS
+from background_refresh import REFRESH_CHECK_SECONDS, BackgroundRefresher
+from instrumentation import record, record_failed_query, record_query, record_shared_query, track_cache
+from single_flight import SingleFlight
+from snapshot_store import load_snapshot, merge_snapshot, save_snapshot, snapshot_version, snapshot_watermark
+from typed_frames import TEXT_COLUMNS, compact_frame
+from write_buffer import WriteBuffer
+
+# Cache lifetimes in seconds for each kind of data
+CACHE_TTLS = {
+    "metrics": 60 * 60,  # Post and account tables are loaded once a day
+    "ideas": 5 * 60,     # Post ideas change from the scheduler page
+    "summary": 60 * 60,  # AI summaries are written by a batch job
+}
+
+# Upper bound on cached query results kept per process
+CACHE_MAX_ENTRIES = 64
+
+# Days re-pulled before a snapshot's watermark so late metric updates are picked up
+SNAPSHOT_LOOKBACK_DAYS = 7
+
+# Seconds the Overview uses the raw tables before retrying a rollup that failed to load
+ROLLUP_RETRY_SECONDS = 10 * 60
+
+# Load the configuration file
+def load_config(file_path="config.json"):
+    with open(file_path, "r") as f:
+        return json.load(f)
+
+# Load the account configuration
+config = load_config()
+
+
+def load_accounts(config):
+    """
+    Expand the configuration into one settings dict per account.
+
+    Top-level keys are shared defaults; each entry of `ACCOUNTS` overrides
+    them (usually just ACCOUNT_NAME and PAGE_ID). A config without
+    `ACCOUNTS` describes a single account.
+    """
+    shared = {key: value for key, value in config.items() if key != "ACCOUNTS"}
+    return [{**shared, **account} for account in config.get("ACCOUNTS", [{}])]
+
+
+ACCOUNTS = load_accounts(config)
+DEFAULT_ACCOUNT = ACCOUNTS[0]
+
+# Set env variables
+PROJECT_ID = config["PROJECT_ID"]
+
+# "bigquery", or "local" to run every query against a DuckDB file instead
+BACKEND = os.environ.get("DATA_BACKEND", config.get("BACKEND", "bigquery"))
+
+# Dataset holding each table, by config key
+TABLE_DATASETS = {
+    "POST_TABLE_ID": "DATASET_ID",
+    "ACCOUNT_TABLE_ID": "DATASET_ID",
+    "IDEAS_TABLE_ID": "ACCOUNT_DATASET_ID",
+    "BUSINESS_TABLE_ID": "ACCOUNT_DATASET_ID",
+    "SUMMARY_TABLE_ID": "ACCOUNT_DATASET_ID",
+    "ROLLUP_TABLE_ID": "DATASET_ID",
+}
+
+# Seconds between checks for changes to the datasets kept warm in the background
+REFRESH_INTERVAL = config.get("REFRESH_CHECK_SECONDS", REFRESH_CHECK_SECONDS)
+
+# Build Posts page filters as BigQuery queries instead of filtering the full table locally
+POST_FILTER_PUSHDOWN = config.get("POST_FILTER_PUSHDOWN", True)
+
+# Columns rendered by the Posts page feed
+POST_FEED_COLUMNS = [
+    "created_time", "caption", "media_type", "source",
+    "reach", "like_count", "comments_count", "saved",
+]
+
+# Optional post column holding a video's poster image URL
+POST_THUMBNAIL_COLUMN = config.get("POST_THUMBNAIL_COLUMN")
+if POST_THUMBNAIL_COLUMN:
+    POST_FEED_COLUMNS.append(POST_THUMBNAIL_COLUMN)
+
+# Sortable Posts page columns and the SQL expression behind each
+POST_SORT_COLUMNS = {
+    "created_time": "created_time",
+    "reach": "reach",
+    "like_count": "like_count",
+    "comments_count": "comments_count",
+    "Like Rate": "like_rate",
+}
+
+# Post idea columns the scheduler can edit, with their BigQuery types
+IDEA_EDIT_COLUMNS = {
+    "date": "DATE",
+    "caption": "STRING",
+    "post_type": "STRING",
+    "themes": "STRING",
+    "tone": "STRING",
+}
+
+# Tables mirrored to a local snapshot, with the column used as their watermark
+SNAPSHOT_TABLES = {
+    "POST_TABLE_ID": "created_time",
+    "ACCOUNT_TABLE_ID": "date",
+}
+
+
+def get_account(page_id=None):
+    """
+    Return the settings for the account with `page_id`, or the default account.
+    """
+    for account in ACCOUNTS:
+        if account["PAGE_ID"] == page_id:
+            return account
+    return DEFAULT_ACCOUNT
+
+
+def select_account():
+    """
+    Let the user pick an account in the sidebar.
+
+    The choice is kept in the `?account=<page_id>` query parameter, so it
+    survives reruns and can be bookmarked.
+
+    Returns:
+        dict: Settings of the selected account.
+    """
+    page_ids = [account["PAGE_ID"] for account in ACCOUNTS]
+    current = get_account(st.query_params.get("account"))["PAGE_ID"]
+
+    if len(ACCOUNTS) > 1:
+        names = {account["PAGE_ID"]: account["ACCOUNT_NAME"] for account in ACCOUNTS}
+        current = st.sidebar.selectbox(
+            "Account", page_ids, index=page_ids.index(current), format_func=names.get
+        )
+        st.query_params["account"] = current
+
+    return get_account(current)
+
+
+def table_ref(account, table_key):
+    """
+    Build the fully qualified `project.dataset.table` reference of an account table.
+
+    Args:
+        account (dict): Account settings from ACCOUNTS.
+        table_key (str): Config key of the table, e.g. "POST_TABLE_ID".
+    """
+    dataset_id = account[TABLE_DATASETS[table_key]]
+    return f"{account['PROJECT_ID']}.{dataset_id}.{account[table_key]}"
+
+
+def page_conditions(account):
+    """
+    Return the SQL conditions and parameters restricting a shared table to one account.
+
+    Accounts with their own tables need no condition. With SHARED_TABLES set,
+    the post, account and ideas tables hold every account's rows, keyed by page_id.
+    """
+    if not account.get("SHARED_TABLES"):
+        return [], ()
+    return ["page_id = @page_id"], (("page_id", "STRING", account["PAGE_ID"]),)
+
+
+def _where(conditions):
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _bigquery():
+    # The client library is slow to import, so it is loaded on first use and never by the local backend
+    if BACKEND == "local":
+        import local_backend
+        return local_backend
+
+    from google.cloud import bigquery
+    return bigquery
+
+
+# One BigQuery client per process, shared by every session and page rerun
+@st.cache_resource(show_spinner=False)
+def get_client():
+    """
+    Return the process-wide BigQuery client.
+
+    Returns:
+        bigquery.Client: Client authenticated with the service account in st.secrets,
+        or a local_backend.LocalClient when BACKEND is "local".
+    """
+    if BACKEND == "local":
+        from local_backend import DEFAULT_DATABASE, LocalClient
+        return LocalClient(config.get("LOCAL_DATABASE", DEFAULT_DATABASE))
+
+    from google.oauth2 import service_account
+
+    credentials = service_account.Credentials.from_service_account_info(
+        st.secrets["gcp_service_account"]
+    )
+    return _bigquery().Client(credentials=credentials, project=PROJECT_ID)
+
+
+# Table versions used to invalidate cached results after writes
+@st.cache_resource(show_spinner=False)
+def _table_versions():
+    return {}
+
+
+def invalidate(table):
+    """
+    Drop every cached result read from `table`.
+
+    Cached entries are keyed by the table version, so bumping it makes the old
+    entries unreachable; they are evicted by the TTL and max_entries bounds.
+
+    Args:
+        table (str): Fully qualified table reference that was written to.
+    """
+    versions = _table_versions()
+    versions[table] = versions.get(table, 0) + 1
+    _refresher().expire(table)
+
+
+def _query_parameter(name, type_, value):
+    # Tuples and lists become ARRAY parameters, e.g. for `page_id IN UNNEST(@page_ids)`
+    bigquery = _bigquery()
+    if isinstance(value, (tuple, list)):
+        return bigquery.ArrayQueryParameter(name, type_, list(value))
+    return bigquery.ScalarQueryParameter(name, type_, value)
+
+
+def _query_job_config(params):
+    if not params:
+        return None
+    return _bigquery().QueryJobConfig(
+        query_parameters=[_query_parameter(name, type_, value) for name, type_, value in params]
+    )
+
+
+# Identical SELECTs in flight at once, shared by every session of the process
+@st.cache_resource(show_spinner=False)
+def _query_flights():
+    return SingleFlight()
+
+
+def _execute_query(query, params):
+    start = time.perf_counter()
+    try:
+        query_job = get_client().query(query, job_config=_query_job_config(params))
+        data = query_job.result().to_dataframe()
+    except Exception as e:
+        record_failed_query(query, e, time.perf_counter() - start)
+        raise
+    record_query(query_job, query, len(data), time.perf_counter() - start)
+    return data
+
+
+def run_query(query, params=()):
+    """
+    Execute a query against BigQuery without caching.
+
+    A SELECT that is identical, parameters included, to one already running
+    waits for that job and shares its result instead of starting another.
+    Other statements always run on their own.
+
+    Args:
+        query (str): SQL text, optionally using @name parameters.
+        params (tuple): (name, type, value) triples for the query parameters;
+            tuple values are passed as arrays.
+
+    Returns:
+        pd.DataFrame: The query result.
+    """
+    if not query.lstrip().upper().startswith(("SELECT", "WITH")):
+        return _execute_query(query, params)
+
+    start = time.perf_counter()
+    data, shared = _query_flights().do((query, repr(tuple(params))), lambda: _execute_query(query, params))
+    if not shared:
+        return data
+    record_shared_query(query, time.perf_counter() - start)
+    # Each caller gets its own frame over the shared data
+    return data.copy(deep=False)
+
+
+@st.cache_data(ttl=max(CACHE_TTLS.values()), max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_query(query, params, table_version, ttl_bucket, compact):
+    data = run_query(query, params)
+    return compact_frame(data) if compact else data
+
+
+def query_df(query, table, params=(), ttl="metrics", compact=False):
+    """
+    Run a query through the shared result cache.
+
+    Args:
+        query (str): SQL text, optionally using @name parameters.
+        table (str): Table the query reads from, used for invalidation.
+        params (tuple): (name, type, value) triples for the query parameters.
+        ttl (str): Key into CACHE_TTLS controlling how long the result is reused.
+        compact (bool): Cache the result in typed_frames' compact layout,
+            without its long text columns.
+
+    Returns:
+        pd.DataFrame: The (possibly cached) query result.
+    """
+    # The time bucket rolls over every `ttl` seconds, giving each query its own expiry
+    ttl_bucket = int(time.time() // CACHE_TTLS[ttl])
+    table_version = _table_versions().get(table, 0)
+    with track_cache(table):
+        return _cached_query(query, tuple(params), table_version, ttl_bucket, compact)
+
+
+@st.cache_resource(show_spinner=False)
+def _refresher():
+    return BackgroundRefresher(check_interval=REFRESH_INTERVAL)
+
+
+def table_change_token(table):
+    """
+    Cheap token that changes whenever `table` does, from its metadata alone.
+
+    Returns:
+        tuple: The table's last modification time and row count.
+    """
+    metadata = get_client().get_table(table)
+    return metadata.modified, metadata.num_rows
+
+
+def kept_warm(key, table, load, ttl="metrics"):
+    """
+    Serve a dataset through the background refresher.
+
+    The first read waits for `load`; later reads return the last good copy
+    at once while it is refreshed in the background, whenever
+    table_change_token reports a change or after CACHE_TTLS[ttl] seconds.
+    Writes through invalidate() drop the copy.
+
+    Args:
+        key (hashable): Identifies the dataset.
+        table (str): Table the dataset is read from.
+        load (callable): load() returns a DataFrame.
+        ttl (str): Key into CACHE_TTLS bounding the copy's age.
+
+    Returns:
+        pd.DataFrame: A shallow copy of the current dataset, so adding
+        columns does not change what other sessions see.
+    """
+    with track_cache(table):
+        data = _refresher().get(key, load, lambda: table_change_token(table), CACHE_TTLS[ttl], tables=(table,))
+    return data.copy(deep=False)
+
+
+def warm_query_df(query, table, params=(), ttl="metrics", compact=False):
+    """Like query_df, but kept warm by the background refresher."""
+    params = tuple(params)
+
+    def load():
+        data = run_query(query, params)
+        return compact_frame(data) if compact else data
+
+    return kept_warm(("query", query, params, compact), table, load, ttl)
+
+
+def fetch_concurrently(loaders):
+    """
+    Run independent loaders in parallel and time each one.
+
+    BigQuery jobs are submitted together, so the total wait is roughly the
+    slowest loader rather than the sum of all of them.
+
+    Args:
+        loaders (dict[str, callable]): Zero-argument functions keyed by name.
+
+    Returns:
+        tuple[dict, dict]: Results and wall-clock seconds, both keyed by name.
+    """
+    # Worker threads share the page's script context so st.error and caching work in them
+    ctx = get_script_run_ctx()
+
+    def timed(loader):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        start = time.perf_counter()
+        result = loader()
+        return result, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max(len(loaders), 1)) as executor:
+        futures = {name: executor.submit(timed, loader) for name, loader in loaders.items()}
+
+    results, timings = {}, {}
+    for name, future in futures.items():
+        results[name], timings[name] = future.result()
+    return results, timings
+
+
+# One writer thread per process, so DML against a table never runs concurrently
+@st.cache_resource(show_spinner=False)
+def _write_executor():
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="bigquery-writer")
+
+
+def submit_write(write, *args):
+    """
+    Run a write in the background writer thread.
+
+    Returns:
+        concurrent.futures.Future: Completes when the write has been applied.
+    """
+    return _write_executor().submit(write, *args)
+
+
+def _append_rows(ref, rows):
+    start = time.perf_counter()
+    job = get_client().load_table_from_dataframe(rows, ref)
+    job.result()  # Wait for the load job to complete
+    record("load", ref, time.perf_counter() - start, rows=len(rows))
+
+    if job.errors:
+        raise Exception(f"Failed to insert rows into BigQuery: {job.errors}")
+
+    invalidate(ref)
+
+
+# Rows waiting to be appended, flushed in bulk on the writer thread
+@st.cache_resource(show_spinner=False)
+def _insert_buffer():
+    return WriteBuffer(_append_rows, submit_write)
+
+
+# Get Business Description
+def pull_busdescription(account=DEFAULT_ACCOUNT):
+    ref = table_ref(account, "BUSINESS_TABLE_ID")
+    conditions, params = page_conditions(account)
+    query = f"SELECT `Description of Business and Instagram Goals` FROM `{ref}` {_where(conditions)} LIMIT 1"
+
+    try:
+        data = query_df(query, ref, params=params, ttl="summary")
+        return data.iloc[0, 0]
+    except Exception as e:
+        st.error(f"Error fetching data: {e}")
+        return None
+
+
+# Get Post Idea Data
+def pull_postideas(account=DEFAULT_ACCOUNT, limit=3):
+    ref = table_ref(account, "IDEAS_TABLE_ID")
+    conditions, params = page_conditions(account)
+    query = f"SELECT * FROM `{ref}` {_where(conditions)} LIMIT {int(limit)}"
+
+    try:
+        return warm_query_df(query, ref, params=params, ttl="ideas")
+    except Exception as e:
+        st.error(f"Error fetching data: {e}")
+        return None
+
+
+# One lock per snapshot file, so a process brings each snapshot up to date once at a time
+@st.cache_resource(show_spinner=False)
+def _snapshot_locks():
+    return {}
+
+
+def sync_table(ref, watermark_column, conditions=(), params=(), snapshot_name=None):
+    """
+    Bring the local snapshot of a table up to date and return it.
+
+    Only rows dated on or after the snapshot's watermark minus
+    SNAPSHOT_LOOKBACK_DAYS are pulled; they replace the same days in the
+    snapshot so recent rows whose metrics changed are refreshed too.
+    Concurrent syncs of one snapshot run one after the other.
+
+    Args:
+        ref (str): Fully qualified table reference.
+        watermark_column (str): Date or timestamp column tracking new rows.
+        conditions (list[str]): Extra SQL conditions, e.g. from page_conditions.
+        params (tuple): Parameters used by `conditions`.
+        snapshot_name (str, optional): Snapshot file name. Defaults to `ref`.
+
+    Returns:
+        pd.DataFrame: The full, updated table.
+    """
+    snapshot_name = snapshot_name or ref
+    with _snapshot_locks().setdefault(snapshot_name, threading.Lock()):
+        snapshot = load_snapshot(snapshot_name)
+        watermark = snapshot_watermark(snapshot, watermark_column)
+
+        if watermark is None:
+            data = run_query(f"SELECT * FROM `{ref}` {_where(conditions)}", params)
+        else:
+            since = watermark - timedelta(days=SNAPSHOT_LOOKBACK_DAYS)
+            where = _where(list(conditions) + [f"CAST({watermark_column} AS DATE) >= @since"])
+            fresh = run_query(f"SELECT * FROM `{ref}` {where}", tuple(params) + (("since", "DATE", since),))
+            data = merge_snapshot(snapshot, fresh, watermark_column, since)
+
+        save_snapshot(snapshot_name, data)
+    return data
+
+
+def _snapshot_name(account, table_key):
+    ref = table_ref(account, table_key)
+    conditions, _ = page_conditions(account)
+    snapshot_name = f"{ref}.{account['PAGE_ID']}" if conditions else ref
+    if BACKEND == "local":
+        # Keep local test data out of the snapshots mirrored from BigQuery
+        snapshot_name = f"local.{snapshot_name}"
+    return snapshot_name
+
+
+def load_table(account, table_key):
+    """
+    Load an account's full post or account table, through its local snapshot.
+
+    The table is returned in typed_frames' compact layout, without captions;
+    use fetch_captions for the posts being displayed. It is kept warm by the
+    background refresher, and falls back to the last saved snapshot when
+    BigQuery cannot be reached on first load.
+
+    Args:
+        account (dict): Account settings from ACCOUNTS.
+        table_key (str): "POST_TABLE_ID" or "ACCOUNT_TABLE_ID".
+    """
+    ref = table_ref(account, table_key)
+    conditions, params = page_conditions(account)
+    snapshot_name = _snapshot_name(account, table_key)
+
+    def load():
+        # Only the compact frame is kept; long text stays in the snapshot file
+        return compact_frame(sync_table(ref, SNAPSHOT_TABLES[table_key], conditions, params, snapshot_name))
+
+    try:
+        return kept_warm(("table", snapshot_name), ref, load, ttl="metrics")
+    except Exception:
+        snapshot = load_snapshot(snapshot_name)
+        if snapshot is None:
+            raise
+        return compact_frame(snapshot)
+
+
+def load_tables_for_accounts(accounts, table_key):
+    """
+    Load the same table for several accounts.
+
+    When the accounts share the table, it is read with a single
+    `page_id IN UNNEST(@page_ids)` query; otherwise each account's own
+    table is loaded concurrently.
+
+    Returns:
+        dict: DataFrames keyed by PAGE_ID.
+    """
+    refs = {table_ref(account, table_key) for account in accounts}
+    if len(refs) == 1 and all(account.get("SHARED_TABLES") for account in accounts):
+        ref = refs.pop()
+        page_ids = tuple(account["PAGE_ID"] for account in accounts)
+        data = query_df(
+            f"SELECT * FROM `{ref}` WHERE page_id IN UNNEST(@page_ids)", ref,
+            params=(("page_ids", "STRING", page_ids),), ttl="metrics", compact=True,
+        )
+        return {page_id: data[data["page_id"] == page_id].reset_index(drop=True) for page_id in page_ids}
+
+    results, _ = fetch_concurrently({
+        account["PAGE_ID"]: (lambda account=account: load_table(account, table_key))
+        for account in accounts
+    })
+    return results
+
+
+# Function to pull a full post or account table from BigQuery
+def pull_dataframes(table_key, account=DEFAULT_ACCOUNT):
+    try:
+        return load_table(account, table_key)
+    except Exception as e:
+        st.error(f"Error fetching data: {e}")
+        return None
+
+
+# Function to pull the latest AI summary for the account
+def pull_accountsummary(account=DEFAULT_ACCOUNT):
+    ref = table_ref(account, "SUMMARY_TABLE_ID")
+    query = f"SELECT * FROM `{ref}` WHERE page_id = @page_id ORDER BY date DESC LIMIT 1"
+
+    try:
+        return warm_query_df(query, ref, params=(("page_id", "STRING", account["PAGE_ID"]),), ttl="summary")
+    except Exception as e:
+        st.error(f"Error fetching data: {e}")
+        return None
+
+
+def fetch_posts(account=DEFAULT_ACCOUNT):
+    """Fetch every post, newest first."""
+    posts = load_table(account, "POST_TABLE_ID")
+    return posts.sort_values(by="created_time", ascending=False, ignore_index=True)
+
+
+def build_post_query(account=DEFAULT_ACCOUNT, order_by="created_time", days=None, limit=None):
+    """
+    Translate a Posts page filter into a parameterized BigQuery query.
+
+    Args:
+        account (dict): Account settings from ACCOUNTS.
+        order_by (str): Key of POST_SORT_COLUMNS, sorted descending.
+        days (int, optional): Only keep posts created in the last `days` days.
+        limit (int, optional): Maximum number of posts returned.
+
+    Returns:
+        tuple[str, tuple]: The SQL text and its (name, type, value) parameters.
+    """
+    if order_by not in POST_SORT_COLUMNS:
+        raise ValueError(f"Unsupported sort column: {order_by}")
+
+    ref = table_ref(account, "POST_TABLE_ID")
+    # Captions are read separately, for the page of posts being shown
+    columns = ", ".join(column for column in POST_FEED_COLUMNS if column not in TEXT_COLUMNS)
+    clauses = [
+        f"SELECT {columns}, ROUND(SAFE_DIVIDE(like_count, reach) * 100, 2) AS like_rate",
+        f"FROM `{ref}`",
+    ]
+    conditions, params = page_conditions(account)
+
+    if days is not None:
+        conditions = conditions + ["CAST(created_time AS DATE) >= @cutoff"]
+        params += (("cutoff", "DATE", date.today() - timedelta(days=days)),)
+
+    if conditions:
+        clauses.append(_where(conditions))
+
+    clauses.append(f"ORDER BY {POST_SORT_COLUMNS[order_by]} DESC")
+
+    if limit is not None:
+        clauses.append("LIMIT @limit")
+        params += (("limit", "INT64", int(limit)),)
+
+    query = "\n".join(clauses)
+    return query, params
+
+
+def fetch_filtered_posts(account=DEFAULT_ACCOUNT, order_by="created_time", days=None, limit=None):
+    """
+    Fetch the posts matching a Posts page filter, cached per account and filter.
+
+    Returns:
+        pd.DataFrame: The feed columns except captions, plus `Like Rate`, in display order.
+    """
+    query, params = build_post_query(account, order_by, days, limit)
+    posts = query_df(query, table_ref(account, "POST_TABLE_ID"), params=params, ttl="metrics", compact=True)
+    return posts.rename(columns={"like_rate": "Like Rate"})
+
+
+# Captions of each post snapshot, shared by every session and read on first use
+@st.cache_resource(max_entries=CACHE_MAX_ENTRIES, show_spinner=False)
+def _snapshot_captions(snapshot_name, version):
+    snapshot = load_snapshot(snapshot_name, columns=["created_time", "caption"])
+    if snapshot is None:
+        return pd.Series(dtype=object)
+    captions = snapshot.set_index(pd.to_datetime(snapshot["created_time"]))["caption"]
+    return captions[~captions.index.duplicated(keep="last")]
+
+
+def fetch_captions(account, created_times):
+    """
+    Read the captions of the posts being displayed.
+
+    Captions come from the account's post snapshot, reading only that
+    column; posts the snapshot does not hold yet are read from BigQuery.
+
+    Args:
+        account (dict): Account settings from ACCOUNTS.
+        created_times (pd.Series): `created_time` of each post.
+
+    Returns:
+        pd.Series: Captions indexed like `created_times`, NaN where unknown.
+    """
+    snapshot_name = _snapshot_name(account, "POST_TABLE_ID")
+    version = snapshot_version(snapshot_name)
+    known = _snapshot_captions(snapshot_name, version) if version is not None else pd.Series(dtype=object)
+
+    missing = created_times[~created_times.isin(known.index)].dropna().unique()
+    if len(missing):
+        ref = table_ref(account, "POST_TABLE_ID")
+        conditions, params = page_conditions(account)
+        conditions = conditions + ["created_time IN UNNEST(@created_times)"]
+        params += (("created_times", "TIMESTAMP", tuple(created.to_pydatetime() for created in missing)),)
+        fetched = query_df(f"SELECT created_time, caption FROM `{ref}` {_where(conditions)}", ref, params=params)
+        fetched = fetched.set_index(pd.to_datetime(fetched["created_time"]))["caption"]
+        fetched = fetched[~fetched.index.duplicated(keep="last")]
+        # Concatenating onto an empty Series is deprecated in pandas
+        known = pd.concat([known, fetched]) if not known.empty else fetched
+
+    return created_times.map(known)
+
+
+# Daily rollup columns, after page_id and date
+ROLLUP_COLUMNS = ["posts"] + [name for name, _ in ROLLUP_ACCOUNT_COLUMNS + ROLLUP_POST_COLUMNS] + ["total_followers"]
+
+
+def refresh_daily_rollup(account=DEFAULT_ACCOUNT, full=False):
+    """
+    Merge the latest days of the post and account tables into the daily rollup.
+
+    Days from SNAPSHOT_LOOKBACK_DAYS before the account's latest rollup day
+    onward are recomputed, so late metric updates are picked up; the first
+    run, or `full=True`, recomputes all history. Rows are matched on
+    (page_id, date), and recomputed days that no longer have data are deleted.
+
+    Args:
+        account (dict): Account settings from ACCOUNTS.
+        full (bool): Recompute every day instead of only recent ones.
+
+    Returns:
+        date: First day recomputed, or None when all history was.
+    """
+    ref = table_ref(account, "ROLLUP_TABLE_ID")
+    columns = ", ".join(f"{name} INT64" for name in ROLLUP_COLUMNS)
+    run_query(f"CREATE TABLE IF NOT EXISTS `{ref}` (page_id STRING, date DATE, {columns})")
+
+    page_param = ("page_id", "STRING", account["PAGE_ID"])
+    since = None
+    if not full:
+        latest = run_query(f"SELECT MAX(date) AS latest FROM `{ref}` WHERE page_id = @page_id", (page_param,))
+        latest = latest.iloc[0]["latest"]
+        if latest is not None and not pd.isna(latest):
+            since = pd.Timestamp(latest).date() - timedelta(days=SNAPSHOT_LOOKBACK_DAYS)
+
+    # Shared tables are restricted with the same @page_id parameter
+    conditions, _ = page_conditions(account)
+    params = (page_param,)
+    if since is not None:
+        params += (("since", "DATE", since),)
+    account_where = _where(conditions + (["CAST(date AS DATE) >= @since"] if since else []))
+    post_where = _where(conditions + (["CAST(created_time AS DATE) >= @since"] if since else []))
+    deleted_days = "AND target.date >= @since" if since else ""
+
+    account_sums = ", ".join(f"SUM({column}) AS {name}" for name, column in ROLLUP_ACCOUNT_COLUMNS)
+    post_sums = ", ".join(f"SUM({column}) AS {name}" for name, column in ROLLUP_POST_COLUMNS)
+    # Account metrics stay NULL on days with posts but no account row
+    totals = ", ".join(
+        [name for name, _ in ROLLUP_ACCOUNT_COLUMNS]
+        + [f"COALESCE({name}, 0) AS {name}" for name in ["posts"] + [name for name, _ in ROLLUP_POST_COLUMNS]]
+    )
+    run_query(f"""
+        MERGE INTO `{ref}` AS target
+        USING (
+            WITH account_days AS (
+                SELECT CAST(date AS DATE) AS date, {account_sums}, MAX(total_followers) AS total_followers
+                FROM `{table_ref(account, "ACCOUNT_TABLE_ID")}`
+                {account_where}
+                GROUP BY 1
+            ),
+            post_days AS (
+                SELECT CAST(created_time AS DATE) AS date, COUNT(*) AS posts, {post_sums}
+                FROM `{table_ref(account, "POST_TABLE_ID")}`
+                {post_where}
+                GROUP BY 1
+            )
+            SELECT @page_id AS page_id, date, {totals}, total_followers
+            FROM account_days FULL OUTER JOIN post_days USING (date)
+        ) AS changes
+        ON target.page_id = changes.page_id AND target.date = changes.date
+        WHEN MATCHED THEN UPDATE SET {", ".join(f"{name} = changes.{name}" for name in ROLLUP_COLUMNS)}
+        WHEN NOT MATCHED THEN INSERT (page_id, date, {", ".join(ROLLUP_COLUMNS)})
+            VALUES (changes.page_id, changes.date, {", ".join(f"changes.{name}" for name in ROLLUP_COLUMNS)})
+        WHEN NOT MATCHED BY SOURCE AND target.page_id = @page_id {deleted_days} THEN DELETE
+    """, params)
+    invalidate(ref)
+    _rollup_failures().pop(ref, None)
+    return since
+
+
+# When each rollup table last failed to load, so the failure is not retried on every rerun
+@st.cache_resource(show_spinner=False)
+def _rollup_failures():
+    return {}
+
+
+def pull_daily_rollup(account=DEFAULT_ACCOUNT):
+    """
+    Fetch the account's daily rollup, oldest day first.
+
+    A rollup that fails to load, e.g. before refresh_rollup.py has created
+    the table, is not tried again for ROLLUP_RETRY_SECONDS.
+
+    Returns:
+        pd.DataFrame: `date` and ROLLUP_COLUMNS, in typed_frames' compact
+        layout, or None until refresh_rollup.py has covered the account.
+    """
+    ref = table_ref(account, "ROLLUP_TABLE_ID")
+    failed_at = _rollup_failures().get(ref)
+    if failed_at is not None and time.monotonic() - failed_at < ROLLUP_RETRY_SECONDS:
+        return None
+
+    query = f"""
+        SELECT date, {", ".join(ROLLUP_COLUMNS)}
+        FROM `{ref}`
+        WHERE page_id = @page_id
+        ORDER BY date
+    """
+    try:
+        rollup = warm_query_df(query, ref, params=(("page_id", "STRING", account["PAGE_ID"]),), ttl="metrics", compact=True)
+    except Exception:
+        # Most likely the table does not exist yet; callers fall back to the raw tables
+        _rollup_failures()[ref] = time.monotonic()
+        return None
+    _rollup_failures().pop(ref, None)
+    return rollup if not rollup.empty else None
+
+
+@st.cache_resource(show_spinner=False)
+def ensure_idea_ids(ref):
+    """
+    Give every row of an ideas table a stable `id`, once per process.
+
+    Adds the column if the table predates it and backfills a UUID for
+    rows written without one.
+    """
+    run_query(f"ALTER TABLE `{ref}` ADD COLUMN IF NOT EXISTS id STRING")
+    run_query(f"UPDATE `{ref}` SET id = GENERATE_UUID() WHERE id IS NULL")
+    invalidate(ref)
+    return True
+
+
+def new_idea_ids(count):
+    return [str(uuid.uuid4()) for _ in range(count)]
+
+
+def fetch_post_ideas(account=DEFAULT_ACCOUNT):
+    """Fetch the scheduled post ideas, oldest first."""
+    ref = table_ref(account, "IDEAS_TABLE_ID")
+    ensure_idea_ids(ref)
+    conditions, params = page_conditions(account)
+    query = f"""
+        SELECT id, date, caption, post_type, themes, tone, source
+        FROM `{ref}`
+        {_where(conditions)}
+        ORDER BY date ASC
+    """
+    return warm_query_df(query, ref, params=params, ttl="ideas")
+
+
+def fetch_latest_idea_date(account=DEFAULT_ACCOUNT):
+    """
+    Fetch the latest scheduled date from the post ideas table.
+
+    Ideas still in the insert buffer count too, so a batch added moments
+    ago is scheduled after rather than on top of.
+
+    Returns:
+        datetime: The latest date, or None if the table is empty.
+    """
+    ref = table_ref(account, "IDEAS_TABLE_ID")
+    conditions, params = page_conditions(account)
+    query = f"""
+        SELECT MAX(date) as latest_date
+        FROM `{ref}`
+        {_where(conditions)}
+    """
+    latest_date = query_df(query, ref, params=params, ttl="ideas").iloc[0]["latest_date"]
+
+    pending, _ = pending_post_ideas(account)
+    if not pending.empty:
+        pending_date = pending["date"].max()
+        if pd.isna(latest_date) or pd.Timestamp(pending_date) > pd.Timestamp(latest_date):
+            latest_date = pending_date
+    return latest_date
+
+
+# Function to add rows to the post ideas table in BigQuery
+def add_post_to_bigquery(post_df, account=DEFAULT_ACCOUNT):
+    """
+    Add post ideas to the post ideas table in BigQuery.
+
+    The ideas are buffered and written in bulk in the background, so this
+    returns immediately; pending_post_ideas() lists ideas not yet written.
+
+    Args:
+        post_df (pd.DataFrame): The dataframe containing the post ideas to be added.
+        account (dict): Account the ideas belong to.
+    """
+    ref = table_ref(account, "IDEAS_TABLE_ID")
+    ensure_idea_ids(ref)
+
+    # Column names are case-insensitive in BigQuery; one spelling lets buffered batches combine
+    post_df = post_df.rename(columns=str.lower)
+    post_df["date"] = pd.to_datetime(post_df["date"]).dt.date
+
+    if "id" not in post_df:
+        post_df["id"] = new_idea_ids(len(post_df))
+
+    # Convert list-type columns to JSON-serializable strings
+    for column in post_df.columns:
+        if post_df[column].apply(lambda x: isinstance(x, list)).any():
+            post_df[column] = post_df[column].apply(json.dumps)
+
+    # Tag rows with their account when the table is shared
+    if account.get("SHARED_TABLES"):
+        post_df["page_id"] = account["PAGE_ID"]
+
+    _insert_buffer().add(ref, post_df)
+
+
+def pending_post_ideas(account=DEFAULT_ACCOUNT):
+    """
+    Return ideas added for an account that are not yet written to BigQuery.
+
+    Returns:
+        tuple[pd.DataFrame, str]: The pending ideas and the last write error, or None.
+    """
+    ref = table_ref(account, "IDEAS_TABLE_ID")
+    buffer = _insert_buffer()
+    pending = buffer.pending(ref)
+    if account.get("SHARED_TABLES") and not pending.empty:
+        pending = pending[pending["page_id"] == account["PAGE_ID"]]
+    return pending, buffer.errors.get(ref)
+
+
+def flush_post_ideas(timeout=None):
+    """Write every buffered idea now; returns True once nothing is pending."""
+    return _insert_buffer().flush(timeout)
+
+
+def add_summaries_to_bigquery(summary_df, account=DEFAULT_ACCOUNT):
+    """
+    Append precomputed AI summaries to the summary table with one load job.
+
+    Args:
+        summary_df (pd.DataFrame): One row per account with `page_id`, `summary` and `date`.
+        account (dict): Any account whose SUMMARY_TABLE_ID holds these rows.
+    """
+    ref = table_ref(account, "SUMMARY_TABLE_ID")
+    start = time.perf_counter()
+    job = get_client().load_table_from_dataframe(summary_df, ref)
+    job.result()  # Wait for the load job to complete
+    record("load", ref, time.perf_counter() - start, rows=len(summary_df))
+
+    if job.errors:
+        raise Exception(f"Failed to load summaries into BigQuery: {job.errors}")
+
+    invalidate(ref)
+
+
+def apply_idea_changes(changes, account=DEFAULT_ACCOUNT):
+    """
+    Apply queued deletes and edits to the post ideas table in one MERGE.
+
+    The changes are loaded into a temporary staging table, merged on `id`
+    and the staging table is dropped, so a whole batch costs one load job
+    and one DML statement however many ideas it touches.
+
+    Args:
+        changes (list[dict]): One entry per idea with `id`, `action`
+            ("delete" or "update") and, for updates, the IDEA_EDIT_COLUMNS
+            values to set; missing values are left unchanged.
+        account (dict): Account the ideas belong to.
+    """
+    if not changes:
+        return
+
+    ref = table_ref(account, "IDEAS_TABLE_ID")
+    staging_ref = f"{ref}_changes_{uuid.uuid4().hex[:12]}"
+
+    # Changes may target ideas still in the insert buffer; this runs on the writer thread, so write them first
+    _insert_buffer().write_now(ref)
+
+    staging = pd.DataFrame(changes).reindex(columns=["id", "action", *IDEA_EDIT_COLUMNS])
+    staging["themes"] = staging["themes"].map(lambda themes: json.dumps(themes) if isinstance(themes, list) else themes)
+    # Missing values as None in object columns; an all-NaN float column cannot be loaded as DATE or STRING
+    for name in staging.columns:
+        staging[name] = staging[name].astype(object).where(staging[name].notna(), None)
+    bigquery = _bigquery()
+    schema = [bigquery.SchemaField(name, "STRING") for name in ("id", "action")] + [
+        bigquery.SchemaField(name, type_) for name, type_ in IDEA_EDIT_COLUMNS.items()
+    ]
+
+    start = time.perf_counter()
+    job = get_client().load_table_from_dataframe(staging, staging_ref, job_config=bigquery.LoadJobConfig(schema=schema))
+    job.result()  # Wait for the load job to complete
+    record("load", staging_ref, time.perf_counter() - start, rows=len(staging))
+
+    updates = ", ".join(
+        f"{name} = COALESCE(CAST(changes.{name} AS {type_}), target.{name})"
+        for name, type_ in IDEA_EDIT_COLUMNS.items()
+    )
+    try:
+        run_query(f"""
+            MERGE INTO `{ref}` AS target
+            USING `{staging_ref}` AS changes
+            ON target.id = changes.id
+            WHEN MATCHED AND changes.action = 'delete' THEN DELETE
+            WHEN MATCHED AND changes.action = 'update' THEN UPDATE SET {updates}
+        """)
+    finally:
+        run_query(f"DROP TABLE IF EXISTS `{staging_ref}`")
+
+    invalidate(ref)
@@ -1,16 +1,9 @@
-import streamlit as st
-import openai
 import pandas as pd
-from datetime import datetime, timedelta
-from google.cloud import bigquery
+from datetime import date, timedelta
 
-# Initialize OpenAI API
-openai.api_key = st.secrets["openai"]["api_key"]
-
-client = openai
-
-# Initialize BigQuery client
-bq_client = bigquery.Client()
+from data_access import DEFAULT_ACCOUNT, fetch_latest_idea_date
+from data_access import add_post_to_bigquery as add_ideas
+from llm import chat_completion
 
 # Function to fetch the latest date and calculate the next post date
 def fetch_latest_date():
@@ -18,15 +11,11 @@ def fetch_latest_date():
     Fetch the latest date from the smp_postideas table and return 3 days after it.
 
     Returns:
-        datetime: The calculated next post date.
+        datetime: The calculated next post date, or today if there are no ideas yet.
     """
-    query = """
-        SELECT MAX(date) as latest_date
-        FROM `bizbuddydemo-v1.strategy_data.smp_postideas`
-    """
-    query_job = bq_client.query(query)
-    result = query_job.result()
-    latest_date = result.to_dataframe().iloc[0]["latest_date"]
+    latest_date = fetch_latest_idea_date()
+    if latest_date is None or pd.isna(latest_date):
+        return date.today()
     return latest_date + timedelta(days=3)
 
 # Function to generate a single post idea
@@ -47,12 +36,14 @@ def generate_post_idea(strategy):
         "Format as a JSON object."
     )
 
-    response = openai.ChatCompletion.create(
+    # Each call should bring a new idea, so the response cache is skipped
+    response = chat_completion(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "You are a social media manager with expertise in creating engaging content."},
             {"role": "user", "content": prompt}
-        ]
+        ],
+        cache=False,
     )
 
     idea_json = response.choices[0].message.content.strip()
@@ -70,18 +61,11 @@ def add_post_to_bigquery(post_df):
     """
     Add a generated post idea to the smp_postideas table in BigQuery.
 
+    Shares the buffered write path of data_access.add_post_to_bigquery.
+
     Args:
         post_df (pd.DataFrame): The dataframe containing the post idea to be added.
     """
-    table_id = "bizbuddydemo-v1.strategy_data.smp_postideas"
-
-    # Convert the dataframe to a dictionary
-    rows_to_insert = post_df.to_dict(orient="records")
-
-    # Insert the rows into BigQuery
-    errors = bq_client.insert_rows_json(table_id, rows_to_insert)
-
-    if errors:
-        raise Exception(f"Failed to insert rows into BigQuery: {errors}")
+    add_ideas(post_df, DEFAULT_ACCOUNT)
 
 # This file is referenced elsewhere, no main function needed
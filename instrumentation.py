@@ -0,0 +1,159 @@
+"""
+Timing and cost records for BigQuery queries and OpenAI calls.
+
+Every record is logged as one JSON line and, inside a Streamlit session,
+kept for the current rerun so render_debug_panel() can break down where
+the page's time went. Open any page with `?debug=1` to show the panel.
+"""
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Session state keys holding the current rerun's records and start time
+EVENTS_KEY = "instrumentation_events"
+RERUN_START_KEY = "instrumentation_rerun_start"
+
+logger = logging.getLogger("instrumentation")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stderr)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# Queries run by each thread, used to tell cache hits from executed queries
+_local = threading.local()
+
+
+def record(kind, name, seconds, **fields):
+    """
+    Log one timed operation and keep it for the current rerun.
+
+    Args:
+        kind (str): "query", "coalesced", "cache", "load", "refresh", "llm" or "llm_retry".
+        name (str): What ran, e.g. a table reference or model.
+        seconds (float): Wall-clock time.
+        **fields: Extra JSON-serializable details.
+    """
+    event = {
+        "ts": datetime.now(timezone.utc).isoformat(),
+        "kind": kind,
+        "name": name,
+        "ms": round(seconds * 1000, 1),
+        **fields,
+    }
+    logger.info(json.dumps(event, default=str))
+
+    if get_script_run_ctx() is not None:
+        st.session_state.setdefault(EVENTS_KEY, []).append(event)
+
+
+def record_query(job, query, rows, seconds):
+    """Record a finished BigQuery job with its cost statistics."""
+    _local.queries = getattr(_local, "queries", 0) + 1
+    record(
+        "query", " ".join(query.split())[:120], seconds,
+        rows=rows,
+        bytes_processed=getattr(job, "total_bytes_processed", None),
+        slot_ms=getattr(job, "slot_millis", None),
+        bigquery_cache_hit=getattr(job, "cache_hit", None),
+        job_id=getattr(job, "job_id", None),
+    )
+
+
+def record_failed_query(query, error, seconds):
+    """Record a query that raised, so failed jobs show up next to the ones that ran."""
+    _local.queries = getattr(_local, "queries", 0) + 1
+    record("query", " ".join(query.split())[:120], seconds, error=f"{type(error).__name__}: {error}"[:200])
+
+
+def record_shared_query(query, seconds):
+    """Record a query answered by another caller's identical in-flight job."""
+    _local.queries = getattr(_local, "queries", 0) + 1
+    record("coalesced", " ".join(query.split())[:120], seconds)
+
+
+@contextmanager
+def track_cache(table):
+    """
+    Record a "cache" event when the wrapped block ran no query.
+
+    Wrap calls to st.cache_data functions, whose cached results would
+    otherwise leave no trace.
+    """
+    before = getattr(_local, "queries", 0)
+    start = time.perf_counter()
+    yield
+    if getattr(_local, "queries", 0) == before:
+        record("cache", table, time.perf_counter() - start)
+
+
+def _usage_fields(usage):
+    if usage is None:
+        return {}
+    return {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+
+
+def record_chat_completion(client, **kwargs):
+    """
+    Call `client.chat.completions.create` and record its latency and token usage.
+
+    Streaming calls return a generator of content-bearing chunks; the record
+    is written once the stream is exhausted.
+    """
+    start = time.perf_counter()
+    if kwargs.get("stream"):
+        kwargs.setdefault("stream_options", {"include_usage": True})
+        return _recorded_stream(client.chat.completions.create(**kwargs), kwargs["model"], start)
+
+    response = client.chat.completions.create(**kwargs)
+    record("llm", kwargs["model"], time.perf_counter() - start, **_usage_fields(response.usage))
+    return response
+
+
+def _recorded_stream(stream, model, start):
+    usage = None
+    first_token = None
+    for chunk in stream:
+        # The final chunk carries usage and no choices
+        if chunk.usage is not None:
+            usage = chunk.usage
+        if chunk.choices:
+            if first_token is None:
+                first_token = time.perf_counter() - start
+            yield chunk
+    record("llm", model, time.perf_counter() - start, first_token_ms=round((first_token or 0) * 1000, 1),
+           **_usage_fields(usage))
+
+
+def start_rerun():
+    """Clear the previous rerun's records; call at the top of each page."""
+    st.session_state[EVENTS_KEY] = []
+    st.session_state[RERUN_START_KEY] = time.perf_counter()
+
+
+def render_debug_panel():
+    """Show this rerun's timing breakdown in the sidebar when `?debug=1` is set."""
+    if st.query_params.get("debug") != "1":
+        return
+
+    events = pd.DataFrame(st.session_state.get(EVENTS_KEY, []))
+    total = time.perf_counter() - st.session_state.get(RERUN_START_KEY, time.perf_counter())
+
+    with st.sidebar.expander("Debug: rerun timings", expanded=True):
+        st.write(f"**Rerun: {total:.2f}s**")
+        if events.empty:
+            st.write("No queries or model calls.")
+            return
+        by_kind = events.groupby("kind")["ms"].agg(["count", "sum"])
+        for kind, row in by_kind.iterrows():
+            st.write(f"{kind}: {int(row['count'])} call(s), {row['sum'] / 1000:.2f}s")
+        st.dataframe(events.drop(columns="ts"), hide_index=True)
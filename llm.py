@@ -0,0 +1,282 @@
+"""
+One gateway for every OpenAI chat completion the app makes.
+
+The gateway is shared by all sessions of a process. It bounds the calls in
+flight, spaces their starts with a token bucket and retries rate limits,
+server errors and timeouts with exponential backoff. Responses are cached
+by the content of the request, and identical requests made at the same
+time share one call, so an identical prompt is only paid for once.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import streamlit as st
+
+from instrumentation import record, record_chat_completion
+from single_flight import SingleFlight
+
+# Model calls in flight at once, across every session of the process
+LLM_MAX_CONCURRENCY = 4
+
+# Calls started per minute, and how many may start back to back after a quiet spell
+LLM_REQUESTS_PER_MINUTE = 60
+LLM_BURST = 5
+
+# Seconds a single attempt may take before it is abandoned and retried
+LLM_TIMEOUT_SECONDS = 60
+
+# Retries after a 429, a 5xx, a timeout or a connection error, waiting
+# LLM_RETRY_BACKOFF_SECONDS doubled on each attempt unless the API says otherwise
+LLM_MAX_RETRIES = 4
+LLM_RETRY_BACKOFF_SECONDS = 1
+LLM_RETRY_MAX_BACKOFF_SECONDS = 30
+
+# Cached responses kept per process, and how long each is reused
+LLM_CACHE_MAX_ENTRIES = 256
+LLM_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+
+# One OpenAI client per process; the library is imported on the first model call
+@st.cache_resource(show_spinner=False)
+def get_openai_client():
+    """
+    Return the process-wide OpenAI client.
+
+    Returns:
+        openai.OpenAI: Client authenticated with the API key in st.secrets.
+    """
+    from openai import OpenAI
+
+    return OpenAI(api_key=st.secrets["openai"]["api_key"])
+
+
+class TokenBucket:
+    """Allow `per_minute` acquisitions per minute on average, up to `burst` at once."""
+
+    def __init__(self, per_minute, burst):
+        self.rate = per_minute / 60.0
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def cache_key(**kwargs):
+    """
+    Content address of a chat completion request.
+
+    Args:
+        **kwargs: The request, e.g. model, messages, temperature.
+
+    Returns:
+        str: A SHA-256 hex digest that is equal for equal requests.
+    """
+    payload = json.dumps(kwargs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _is_retryable(error):
+    import openai
+
+    if isinstance(error, openai.APIConnectionError):  # Includes timeouts
+        return True
+    return isinstance(error, openai.APIStatusError) and (error.status_code == 429 or error.status_code >= 500)
+
+
+def _retry_after(error):
+    # Honour the API's own Retry-After hint when it sends one
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class SlotStream:
+    """
+    Iterator over a streamed response that holds a concurrency slot.
+
+    The slot is released once, when the stream ends, fails, is closed or is
+    garbage-collected. That includes a stream dropped before its first chunk,
+    whose generator would never run a `finally` block.
+    """
+
+    def __init__(self, chunks, release):
+        self._chunks = chunks
+        self._release = release
+        self._released = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self._chunks)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        try:
+            self._chunks.close()
+        finally:
+            self._release()
+
+    def __del__(self):
+        self.close()
+
+
+class LLMGateway:
+    """
+    Rate-limited, retrying and caching access to chat completions.
+
+    Args:
+        client (openai.OpenAI, optional): Defaults to get_openai_client() on first call.
+        max_concurrency (int): Calls in flight at once; a stream holds its slot until it ends.
+        requests_per_minute (float): Average rate at which calls start.
+        burst (int): Calls that may start back to back.
+        timeout (float): Seconds per attempt.
+        max_retries (int): Retries of a failed attempt.
+    """
+
+    def __init__(self, client=None, max_concurrency=LLM_MAX_CONCURRENCY,
+                 requests_per_minute=LLM_REQUESTS_PER_MINUTE, burst=LLM_BURST,
+                 timeout=LLM_TIMEOUT_SECONDS, max_retries=LLM_MAX_RETRIES):
+        self._client = client
+        self._configured_client = None
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.slots = threading.BoundedSemaphore(max_concurrency)
+        self.bucket = TokenBucket(requests_per_minute, burst)
+
+        # Responses by cache_key, least recently used first, with when they were stored
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Cacheable requests in flight, shared with identical requests made meanwhile
+        self._flights = SingleFlight()
+
+    @property
+    def client(self):
+        if self._configured_client is None:
+            # The gateway owns retries, so the SDK's own are turned off
+            client = self._client or get_openai_client()
+            self._configured_client = client.with_options(timeout=self.timeout, max_retries=0)
+        return self._configured_client
+
+    def chat_completion(self, cache=True, **kwargs):
+        """
+        Create a chat completion, like `client.chat.completions.create`.
+
+        Args:
+            cache (bool): Reuse the response of an identical earlier or
+                in-flight request. Pass False where a fresh answer is the
+                point of asking again.
+            **kwargs: Request parameters. With `stream=True` an iterator of
+                chunks is returned; a cached stream replays its text as one str.
+
+        Returns:
+            ChatCompletion, or a SlotStream for streams.
+        """
+        key = cache_key(**kwargs) if cache else None
+        cached = self._cached(key)
+        if cached is not None:
+            record("cache", f"llm {kwargs['model']}", 0.0)
+            return iter([cached]) if kwargs.get("stream") else cached
+
+        if key is None or kwargs.get("stream"):
+            return self._call(kwargs, key)
+
+        start = time.perf_counter()
+        response, shared = self._flights.do(key, lambda: self._call(kwargs, key))
+        if shared:
+            record("coalesced", f"llm {kwargs['model']}", time.perf_counter() - start)
+        return response
+
+    def _call(self, kwargs, key):
+        self.slots.acquire()
+        try:
+            response = self._create(kwargs)
+        except BaseException:
+            self.slots.release()
+            raise
+
+        if kwargs.get("stream"):
+            return SlotStream(self._stream(response, key), self.slots.release)
+        self.slots.release()
+        self._store(key, response)
+        return response
+
+    def _create(self, kwargs):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                return record_chat_completion(self.client, **kwargs)
+            except Exception as e:
+                if attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                backoff = min(LLM_RETRY_BACKOFF_SECONDS * 2 ** attempt, LLM_RETRY_MAX_BACKOFF_SECONDS)
+                delay = _retry_after(e) or backoff * random.uniform(0.5, 1.0)
+                record("llm_retry", kwargs["model"], delay, error=type(e).__name__, attempt=attempt + 1)
+                time.sleep(delay)
+
+    def _stream(self, stream, key):
+        # Caches the text once the whole stream has been read
+        parts = []
+        for chunk in stream:
+            parts.append(chunk.choices[0].delta.content or "")
+            yield chunk
+        self._store(key, "".join(parts))
+
+    def _cached(self, key):
+        if key is None:
+            return None
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            stored_at, response = entry
+            if time.monotonic() - stored_at > LLM_CACHE_TTL_SECONDS:
+                del self._cache[key]
+                return None
+            self._cache.move_to_end(key)
+            return response
+
+    def _store(self, key, response):
+        if key is None:
+            return
+        with self._cache_lock:
+            self._cache[key] = (time.monotonic(), response)
+            self._cache.move_to_end(key)
+            while len(self._cache) > LLM_CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+
+
+# One gateway per process, so its limits and cache cover every session
+@st.cache_resource(show_spinner=False)
+def get_llm_gateway():
+    return LLMGateway()
+
+
+def chat_completion(cache=True, **kwargs):
+    """Create a chat completion through the process-wide LLMGateway."""
+    return get_llm_gateway().chat_completion(cache=cache, **kwargs)
@@ -0,0 +1,141 @@
+"""
+Local stand-in for the BigQuery client, backed by DuckDB.
+
+Selected with `"BACKEND": "local"` in config.json (or DATA_BACKEND=local),
+it runs the app's queries against a local database file so pages can be
+run and timed without a GCP project.
+"""
+import re
+import threading
+from collections import namedtuple
+
+import pandas as pd
+
+# Database file used when LOCAL_DATABASE is not configured
+DEFAULT_DATABASE = ".local_bigquery.duckdb"
+
+# BigQuery functions the queries rely on that DuckDB lacks
+MACROS = [
+    "CREATE MACRO IF NOT EXISTS SAFE_DIVIDE(a, b) AS CASE WHEN b = 0 THEN NULL ELSE a / b END",
+    "CREATE MACRO IF NOT EXISTS GENERATE_UUID() AS CAST(uuid() AS VARCHAR)",
+]
+
+# Stand-ins for the google.cloud.bigquery job configuration classes data_access builds
+ScalarQueryParameter = namedtuple("ScalarQueryParameter", ["name", "type_", "value"])
+ArrayQueryParameter = namedtuple("ArrayQueryParameter", ["name", "array_type", "values"])
+QueryJobConfig = namedtuple("QueryJobConfig", ["query_parameters"])
+SchemaField = namedtuple("SchemaField", ["name", "field_type"])
+LoadJobConfig = namedtuple("LoadJobConfig", ["schema"], defaults=[None])
+
+# What get_table reports; `modified` is a content checksum standing in for the modification time
+LocalTable = namedtuple("LocalTable", ["table_id", "num_rows", "modified"])
+
+_UNNEST_PARAM = re.compile(r"IN\s+UNNEST\(\s*@(\w+)\s*\)", re.IGNORECASE)
+_PARAM = re.compile(r"@(\w+)")
+_QUOTED_NAME = re.compile(r"`([^`]+)`")
+_SELECT_LIST = re.compile(r"SELECT\s+(.*?)\s+FROM", re.IGNORECASE | re.DOTALL)
+
+
+def translate_query(query):
+    """
+    Rewrite BigQuery SQL into the DuckDB dialect.
+
+    Backtick-quoted names, including `project.dataset.table` references,
+    become double-quoted identifiers, so each table is stored under its
+    full BigQuery name. @name parameters become $name.
+    """
+    query = _UNNEST_PARAM.sub(r"IN (SELECT UNNEST($\1))", query)
+    query = _PARAM.sub(r"$\1", query)
+    return _QUOTED_NAME.sub(r'"\1"', query)
+
+
+def _result_names(query, columns):
+    # BigQuery names result columns as spelled in the select list, DuckDB as stored
+    select_list = _SELECT_LIST.search(query)
+    if not select_list:
+        return {}
+    spelled = {word.lower(): word for word in re.findall(r"\w+", select_list.group(1))}
+    return {column: spelled[column.lower()] for column in columns if spelled.get(column.lower(), column) != column}
+
+
+def _parameters(job_config):
+    # Accepts a QueryJobConfig from this module or from google.cloud.bigquery
+    if job_config is None:
+        return {}
+    return {
+        parameter.name: parameter.values if hasattr(parameter, "values") else parameter.value
+        for parameter in job_config.query_parameters
+    }
+
+
+class LocalRowIterator:
+    """Query result with the RowIterator method the app uses."""
+
+    def __init__(self, dataframe):
+        self._dataframe = dataframe
+        self.total_rows = len(dataframe)
+
+    def to_dataframe(self):
+        return self._dataframe
+
+
+class LocalJob:
+    """Finished query or load job; the work runs when the job is created."""
+
+    def __init__(self, dataframe=None):
+        self._rows = LocalRowIterator(dataframe if dataframe is not None else pd.DataFrame())
+        self.errors = None
+
+    def result(self):
+        return self._rows
+
+
+class LocalClient:
+    """
+    The subset of bigquery.Client used by data_access, on a DuckDB database.
+
+    Args:
+        database (str): Database file, or ":memory:" for a throwaway database.
+    """
+
+    def __init__(self, database=DEFAULT_DATABASE):
+        import duckdb
+
+        self.connection = duckdb.connect(database)
+        self.connection.execute("SET TimeZone = 'UTC'")
+        for macro in MACROS:
+            self.connection.execute(macro)
+        # Writes are serialized; reads use their own cursors and run concurrently
+        self.write_lock = threading.Lock()
+
+    def query(self, query, job_config=None):
+        cursor = self.connection.cursor()
+        cursor.execute(translate_query(query), _parameters(job_config))
+        if not cursor.description:
+            return LocalJob()
+        result = cursor.df()
+        return LocalJob(result.rename(columns=_result_names(query, result.columns)))
+
+    def load_table_from_dataframe(self, dataframe, destination, job_config=None):
+        """Append `dataframe` to `destination`, creating the table on first load."""
+        table = f'"{destination}"'
+        with self.write_lock:
+            cursor = self.connection.cursor()
+            cursor.register("load_frame", dataframe)
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} AS SELECT * FROM load_frame LIMIT 0"
+            )
+            cursor.execute(f"INSERT INTO {table} BY NAME SELECT * FROM load_frame")
+            cursor.unregister("load_frame")
+        return LocalJob()
+
+    def get_table(self, table):
+        """Row count and content checksum of `table`, in place of BigQuery's table metadata."""
+        cursor = self.connection.cursor()
+        num_rows, checksum = cursor.execute(f'SELECT COUNT(*), BIT_XOR(HASH(t)) FROM "{table}" t').fetchone()
+        return LocalTable(table, num_rows, checksum)
+
+    def insert_rows_json(self, table, json_rows):
+        """Stream rows into `table`; returns the (always empty) list of row errors."""
+        self.load_table_from_dataframe(pd.DataFrame(json_rows), table).result()
+        return []
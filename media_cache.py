@@ -0,0 +1,130 @@
+import hashlib
+import io
+import os
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+
+from PIL import Image
+
+# Local directory holding downscaled post media
+MEDIA_CACHE_DIR = ".media_cache"
+
+# Least recently used thumbnails are evicted above this size
+MEDIA_CACHE_MAX_BYTES = 200 * 1024 * 1024
+
+# Thumbnails older than this are re-downloaded from the current media URL
+MEDIA_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60
+
+# Default thumbnail width in pixels, matching the Posts page media width
+THUMBNAIL_WIDTH = 500
+
+# Seconds to wait for the Instagram CDN before giving up
+DOWNLOAD_TIMEOUT = 10
+
+
+def media_key(url):
+    """
+    Return a cache key for a media URL that survives CDN URL refreshes.
+
+    Instagram CDN links carry expiring signatures in the query string, so only
+    the host and path identify the media.
+    """
+    parts = urllib.parse.urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def _cache_path(key, width):
+    digest = hashlib.sha1(f"{key}:{width}".encode("utf-8")).hexdigest()
+    return os.path.join(MEDIA_CACHE_DIR, f"{digest}.jpg")
+
+
+def _download(url):
+    with urllib.request.urlopen(url, timeout=DOWNLOAD_TIMEOUT) as response:
+        return response.read()
+
+
+def _make_thumbnail(data, width):
+    image = Image.open(io.BytesIO(data))
+    image.thumbnail((width, width * 4))
+    output = io.BytesIO()
+    image.convert("RGB").save(output, format="JPEG", quality=85)
+    return output.getvalue()
+
+
+def _evict(max_bytes=MEDIA_CACHE_MAX_BYTES):
+    # Access times are set explicitly on every hit, so they order entries by last use
+    entries = []
+    for name in os.listdir(MEDIA_CACHE_DIR):
+        if name.endswith(".tmp"):
+            continue  # Being written by another session
+        path = os.path.join(MEDIA_CACHE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_atime, stat.st_size, path))
+
+    total_bytes = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total_bytes -= size
+
+
+def get_thumbnail(url, key=None, width=THUMBNAIL_WIDTH):
+    """
+    Return a local, downscaled copy of a post image.
+
+    Missing or expired thumbnails are downloaded from `url`; if that fails (for
+    example because the CDN link has expired) a stale copy is served instead.
+
+    Args:
+        url (str): Current media URL.
+        key (str, optional): Stable id for the media. Defaults to media_key(url).
+        width (int): Maximum thumbnail width in pixels.
+
+    Returns:
+        str: Path of the cached thumbnail, or None if no copy could be made.
+    """
+    if not url:
+        return None
+
+    path = _cache_path(key or media_key(url), width)
+    now = time.time()
+
+    if os.path.exists(path):
+        fetched_at = os.path.getmtime(path)
+        if now - fetched_at < MEDIA_CACHE_TTL_SECONDS:
+            os.utime(path, (now, fetched_at))
+            return path
+
+    try:
+        thumbnail = _make_thumbnail(_download(url), width)
+    except Exception:
+        if os.path.exists(path):
+            os.utime(path, (now, os.path.getmtime(path)))
+            return path
+        return None
+
+    # A unique temporary file per call, so sessions fetching the same image never share one
+    tmp_path = None
+    try:
+        os.makedirs(MEDIA_CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=MEDIA_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(thumbnail)
+        os.replace(tmp_path, path)
+    except OSError:
+        # Treated as a cache miss; the caller falls back to the media URL
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+    _evict()
+    return path
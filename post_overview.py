@@ -1,11 +1,20 @@
 import streamlit as st
-from google.oauth2 import service_account
-from google.cloud import bigquery
 import pandas as pd
-from datetime import date, timedelta
-import json
+
+from analytics import filter_last_30_days, filter_last_6_months, to_calendar_days, top_10_by_column
+from data_access import (
+    POST_FILTER_PUSHDOWN,
+    POST_THUMBNAIL_COLUMN,
+    fetch_captions,
+    fetch_filtered_posts,
+    fetch_posts,
+    select_account,
+)
+from instrumentation import render_debug_panel, start_rerun
+from media_cache import get_thumbnail
 
 st.set_page_config(page_title="Post Analyzer", layout="wide", page_icon="📱")
+start_rerun()
 
 # Define links to other pages
 PAGES = {
@@ -20,59 +29,92 @@ st.sidebar.title("Navigation")
 for page, url in PAGES.items():
     st.sidebar.markdown(f"[**{page}**]({url})", unsafe_allow_html=True)
 
-# Load the configuration file
-def load_config(file_path="config.json"):
-    with open(file_path, "r") as f:
-        return json.load(f)
+# Filter buttons and the query each one pushes down: (days back, sort column, row limit)
+POST_FILTERS = {
+    "Last 30 Days": (30, "created_time", None),
+    "Last 6 Months": (182, "created_time", None),
+    "All Time": (None, "created_time", None),
+    "Top 10 by Reach": (None, "reach", 10),
+    "Top 10 by Likes": (None, "like_count", 10),
+    "Top 10 by Like Rate": (None, "Like Rate", 10),
+    "Top 10 by Comments": (None, "comments_count", 10),
+}
 
-# Load the account configuration
-config = load_config()
+# Posts shown when no filter is selected
+DEFAULT_FILTER = (None, "created_time", 25)
 
-# Load credentials and project ID from st.secrets
-credentials = service_account.Credentials.from_service_account_info(
-    st.secrets["gcp_service_account"]
-)
-project_id = st.secrets["gcp_service_account"]["project_id"]
-
-# Function to fetch data from BigQuery
-def fetch_data(query: str) -> pd.DataFrame:
-    client = bigquery.Client(credentials=credentials, project=project_id)
-    query_job = client.query(query)  # Make a query request
-    result = query_job.result()  # Wait for the query to finish
-    return result.to_dataframe()
-
-# Define filter functions
-def filter_last_30_days(df):
-    cutoff = date.today() - timedelta(days=30)
-    return df[df["created_time"] >= cutoff].sort_values(by="created_time", ascending=False)
-
-def filter_last_6_months(df):
-    cutoff = date.today() - timedelta(days=182)  # Approx. 6 months
-    return df[df["created_time"] >= cutoff].sort_values(by="created_time", ascending=False)
-
-def top_10_by_column(df, column):
-    return df.sort_values(by=column, ascending=False).head(10)
-
-# Use the variables in your app
-account_name = config["ACCOUNT_NAME"]
-datasetid = config["DATASET_ID"]
-tableid = config["POST_TABLE_ID"]
-
-### Get data ###
-query = f"""
-SELECT *
-FROM `bizbuddydemo-v1.{datasetid}.{tableid}`
-ORDER BY created_time DESC
-"""
+# Same filters applied in pandas when pushdown is disabled
+LOCAL_FILTERS = {
+    "Last 30 Days": filter_last_30_days,
+    "Last 6 Months": filter_last_6_months,
+    "All Time": lambda df: df,
+    "Top 10 by Reach": lambda df: top_10_by_column(df, "reach"),
+    "Top 10 by Likes": lambda df: top_10_by_column(df, "like_count"),
+    "Top 10 by Like Rate": lambda df: top_10_by_column(df, "Like Rate"),
+    "Top 10 by Comments": lambda df: top_10_by_column(df, "comments_count"),
+}
+
+# Page sizes offered for the post feed
+PAGE_SIZE_OPTIONS = [5, 10, 25, 50]
 
 # Load/Transform Data
-data = fetch_data(query)
-data["Like Rate"] = round(data["like_count"]/data["reach"] * 100, 2)
-data["created_time"] = pd.to_datetime(data["created_time"]).dt.date
+def load_all_posts(account):
+    data = fetch_posts(account)
+    data["Like Rate"] = (data["like_count"] / data["reach"] * 100).round(2).astype("float32")
+    return data
+
+def get_filtered_posts(account, filter_name=None):
+    # Only the posts for the selected filter are transferred when pushdown is on
+    if POST_FILTER_PUSHDOWN:
+        days, order_by, limit = POST_FILTERS.get(filter_name, DEFAULT_FILTER)
+        return fetch_filtered_posts(account, order_by, days, limit)
+
+    data = load_all_posts(account)
+    if filter_name is None:
+        return data.sort_values(by="created_time", ascending=False).head(25)
+    return LOCAL_FILTERS[filter_name](data)
+
+
+def set_feed_page(page):
+    st.session_state["feed_page"] = page
+
+def select_filter(filter_name):
+    # Filters persist across reruns so paging keeps the same result set
+    st.session_state["post_filter"] = filter_name
+    st.session_state["feed_page"] = 0
+
+def jump_to_date(created_times, page_size):
+    # Open the page holding the first post on or before the chosen date
+    target = st.session_state.get("jump_date")
+    if target is None:
+        return
+    matches = (to_calendar_days(created_times) <= pd.Timestamp(target)).to_numpy().nonzero()[0]
+    position = matches[0] if len(matches) else max(len(created_times) - 1, 0)
+    set_feed_page(position // page_size)
+
+def render_pagination(filtered_data, page_size, position):
+    """
+    Show feed navigation and return the index of the page to render.
+    """
+    num_pages = max((len(filtered_data) - 1) // page_size + 1, 1)
+    page = min(st.session_state.get("feed_page", 0), num_pages - 1)
+
+    prev_col, info_col, next_col = st.columns([1, 2, 1])
+    with prev_col:
+        st.button("← Previous", key=f"prev_{position}", disabled=page == 0,
+                  on_click=set_feed_page, args=(page - 1,))
+    with info_col:
+        st.markdown(f"<div style='text-align: center;'>Page {page + 1} of {num_pages} ({len(filtered_data)} posts)</div>", unsafe_allow_html=True)
+    with next_col:
+        st.button("Next →", key=f"next_{position}", disabled=page >= num_pages - 1,
+                  on_click=set_feed_page, args=(page + 1,))
+    return page
 
 
 # Main app
 def main():
+    account = select_account()
+
     # Add custom CSS for centering text
     st.markdown("""
     <style>
@@ -100,48 +142,30 @@ def main():
     st.markdown('<div class="centered-title">Social Buddy - Post Analyzer</div>', unsafe_allow_html=True)
     
     # Centered header
-    st.markdown(f'<div class="centered-header">{account_name}</div>', unsafe_allow_html=True)
+    st.markdown(f'<div class="centered-header">{account["ACCOUNT_NAME"]}</div>', unsafe_allow_html=True)
 
     # Centered header
     st.markdown(f'<div class="left-header">Filter Posts:</div>', unsafe_allow_html=True)
 
     # Add buttons for filtering options
     st.markdown('<div style="text-align: center;">', unsafe_allow_html=True)
-    col1, col2, col3, col4, col5, col6, col7 = st.columns([1, 1, 1, 1, 1, 1, 1])
-    
-    with col1:
-        if st.button("Last 30 Days"):
-            filtered_data = filter_last_30_days(data)
-    
-    with col2:
-        if st.button("Last 6 Months"):
-            filtered_data = filter_last_6_months(data)
-
-    with col3:
-        if st.button("All Time"):
-            filtered_data = data
-    
-    with col4:
-        if st.button("Top 10 by Reach"):
-            filtered_data = top_10_by_column(data, "reach")
-    
-    with col5:
-        if st.button("Top 10 by Likes"):
-            filtered_data = top_10_by_column(data, "like_count")
-    
-    with col6:
-        if st.button("Top 10 by Like Rate"):
-            filtered_data = top_10_by_column(data, "Like Rate")
-    
-    with col7:
-        if st.button("Top 10 by Comments"):
-            filtered_data = top_10_by_column(data, "comments_count")
+    for filter_col, filter_name in zip(st.columns(len(POST_FILTERS)), POST_FILTERS):
+        with filter_col:
+            st.button(filter_name, on_click=select_filter, args=(filter_name,))
     
     st.markdown('</div>', unsafe_allow_html=True)
     
-    # If no filter is selected, display all data sorted by date
-    if "filtered_data" not in locals():
-        filtered_data = data.sort_values(by="created_time", ascending=False).head(25)
+    # If no filter is selected, display the latest posts sorted by date
+    selected_filter = st.session_state.get("post_filter")
+    filtered_data = get_filtered_posts(account, selected_filter)
+
+    size_col, date_col = st.columns(2)
+    with size_col:
+        page_size = st.selectbox("Posts per page", PAGE_SIZE_OPTIONS, index=1,
+                                 on_change=set_feed_page, args=(0,))
+    with date_col:
+        st.date_input("Jump to date", value=None, key="jump_date",
+                      on_change=jump_to_date, args=(filtered_data["created_time"], page_size))
     
     st.markdown("""
     <style>
@@ -183,16 +207,21 @@ def main():
     # Define a consistent media width
     MEDIA_WIDTH = 500
 
+    page = render_pagination(filtered_data, page_size, "top")
+    page_data = filtered_data.iloc[page * page_size:(page + 1) * page_size]
+    # Captions are only read for the posts on this page
+    page_data = page_data.assign(caption=fetch_captions(account, page_data["created_time"]).fillna(""))
+
     st.markdown("---") 
     
-    # Iterate through the top posts and display them
-    for index, row in filtered_data.iterrows():
+    # Iterate through the posts on the current page and display them
+    for index, row in page_data.iterrows():
         # Create three columns for spacing and content
         spacer1, col1, col2, spacer2 = st.columns([0.5, 2, 1, 0.5])  # Adjust widths as needed
         
         with col1:
             # Display created_time
-            st.markdown(f"<div class='details'>Posted On: {row['created_time']}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div class='details'>Posted On: {row['created_time'].date()}</div>", unsafe_allow_html=True)
     
             # Display caption with title
             st.markdown(f"<div class='caption'>Caption: {row['caption']}</div>", unsafe_allow_html=True)
@@ -213,12 +242,22 @@ def main():
             # Display media in a styled container
             st.markdown('<div class="media">', unsafe_allow_html=True)
             if row['media_type'] == 'IMAGE':
-                st.image(row['source'], width=MEDIA_WIDTH)
+                # Serve a local downscaled copy, falling back to the CDN URL
+                st.image(get_thumbnail(row['source'], width=MEDIA_WIDTH) or row['source'], width=MEDIA_WIDTH)
             elif row['media_type'] == 'VIDEO':
-                st.video(row['source'], start_time=0, format="video/mp4")
+                poster_url = row.get(POST_THUMBNAIL_COLUMN) if POST_THUMBNAIL_COLUMN else None
+                poster = get_thumbnail(poster_url, width=MEDIA_WIDTH) if poster_url else None
+                if poster:
+                    st.image(poster, width=MEDIA_WIDTH)
+                # Videos are only loaded once the viewer asks for them
+                if st.toggle("Play video", key=f"video_{selected_filter}_{index}"):
+                    st.video(row['source'], start_time=0, format="video/mp4")
             st.markdown('</div>', unsafe_allow_html=True)
     
         st.markdown("---")  # Divider between posts
 
+    render_pagination(filtered_data, page_size, "bottom")
+
 if __name__ == "__main__":
     main()
+    render_debug_panel()
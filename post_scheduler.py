@@ -1,12 +1,24 @@
 import streamlit as st
-from google.cloud import bigquery
-from google.oauth2 import service_account
 import pandas as pd
-from datetime import datetime, timedelta
-import openai
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 import json
 
+from data_access import (
+    IDEA_EDIT_COLUMNS,
+    add_post_to_bigquery,
+    apply_idea_changes,
+    fetch_latest_idea_date,
+    fetch_post_ideas,
+    pending_post_ideas,
+    select_account,
+    submit_write,
+)
+from instrumentation import render_debug_panel, start_rerun
+from llm import chat_completion
+
 st.set_page_config(page_title="Post Scheduler", layout="wide", page_icon = "🗓️")
+start_rerun()
 
 # Define links to other pages
 PAGES = {
@@ -21,91 +33,120 @@ st.sidebar.title("Navigation")
 for page, url in PAGES.items():
     st.sidebar.markdown(f"[**{page}**]({url})", unsafe_allow_html=True)
 
-# Load the configuration file
-def load_config(file_path="config.json"):
-    with open(file_path, "r") as f:
-        return json.load(f)
-
-# Load the account configuration
-config = load_config()
-
-# Set env variables
-ACCOUNT_NAME = config["ACCOUNT_NAME"]
-PROJECT_ID = config["PROJECT_ID"]
-ACCOUNT_DATASET_ID = config["ACCOUNT_DATASET_ID"]
-IDEAS_TABLE_ID = config["IDEAS_TABLE_ID"]
-
-# Load credentials and project ID from st.secrets
-credentials = service_account.Credentials.from_service_account_info(
-    st.secrets["gcp_service_account"]
-)
-
-# Load BQ Client
-bq_client = bigquery.Client(credentials=credentials, project=PROJECT_ID)
+# Most ideas requested from the model in a single call
+IDEAS_PER_CALL = 10
 
-openai.api_key = st.secrets["openai"]["api_key"]
+# Days between consecutive scheduled posts
+POST_SPACING_DAYS = 3
 
-# Initialize OpenAI client
-client = openai
+# Columns returned for every generated idea
+IDEA_COLUMNS = ["Date", "caption", "post_type", "themes", "tone", "source"]
 
 
 # Function to fetch the latest date and calculate the next post date
-def fetch_latest_date():
+def fetch_latest_date(account):
     """
-    Fetch the latest date from the smp_postideas table and return 3 days after it.
+    Fetch the latest date from the smp_postideas table and return POST_SPACING_DAYS after it.
+
+    Args:
+        account (dict): Account whose schedule is extended.
 
     Returns:
-        datetime: The calculated next post date.
-    """
-    query = """
-        SELECT MAX(date) as latest_date
-        FROM `bizbuddydemo-v1.strategy_data.smp_postideas`
+        datetime: The calculated next post date, or today if the account has no ideas yet.
     """
-    query_job = bq_client.query(query)
-    result = query_job.result()
-    latest_date = result.to_dataframe().iloc[0]["latest_date"]
-    return latest_date + timedelta(days=3)
+    latest_date = fetch_latest_idea_date(account)
+    if latest_date is None or pd.isna(latest_date):
+        return date.today()
+    return latest_date + timedelta(days=POST_SPACING_DAYS)
 
-# Function to generate a single post idea
-def generate_post_idea(strategy):
+# Function to request a batch of post ideas in one model call
+def request_post_ideas(strategy, count):
     """
-    Generate a single post idea using the provided strategy.
+    Ask the model for `count` post ideas in a single call.
 
     Args:
         strategy (dict): A dictionary containing the social media strategy.
+        count (int): Number of ideas to request.
 
     Returns:
-        pd.DataFrame: A dataframe containing the generated post idea.
+        pd.DataFrame: One row per generated idea, without dates assigned.
     """
     prompt = (
-        f"Based on this social media strategy: {strategy}, generate 1 post idea. "
+        f"Based on this social media strategy: {strategy}, generate {count} post ideas. "
         "Each idea should include the post Date, caption content, post type (e.g., Reel, Story, Static Post), "
-        "themes (from the strategy), and tone. Ensure that the returned JSON object only has these columns with the exact names: 'Date', 'caption', 'post_type', 'themes', 'tone', 'source'. Ensure the idea aligns with the strategy and introduces a mix of concepts. "
-        "Format as a JSON object."
+        "themes (from the strategy), and tone. Ensure that each idea only has these columns with the exact names: 'Date', 'caption', 'post_type', 'themes', 'tone', 'source'. Ensure the ideas align with the strategy and introduce a mix of concepts. "
+        "Format as a JSON object with a single key 'ideas' holding an array of the ideas."
     )
 
-    response = client.chat.completions.create(
+    # Each click should bring new ideas, so the response cache is skipped
+    response = chat_completion(
         model="gpt-4o-mini",
         messages=[
             {"role": "system", "content": "You are a social media manager with expertise in creating engaging content."},
             {"role": "user", "content": prompt}
-        ]
+        ],
+        response_format={"type": "json_object"},
+        cache=False,
     )
 
-    idea_json = response.choices[0].message.content.strip()
+    ideas = json.loads(response.choices[0].message.content)["ideas"]
+
+    # Convert the JSON ideas to a DataFrame
+    ideas_df = pd.DataFrame(ideas)
+    return ideas_df.reindex(columns=IDEA_COLUMNS).head(count)
+
+# Function to generate several post ideas at once
+def generate_post_ideas(strategy, count, account):
+    """
+    Generate `count` post ideas using the provided strategy.
+
+    Ideas are requested in batches of IDEAS_PER_CALL, concurrently, and dated
+    POST_SPACING_DAYS apart starting from a single lookup of the latest date.
+
+    Args:
+        strategy (dict): A dictionary containing the social media strategy.
+        count (int): Number of ideas to generate.
+        account (dict): Account whose schedule the ideas are added to.
+
+    Returns:
+        pd.DataFrame: A dataframe containing the generated post ideas.
+    """
+    batch_sizes = [IDEAS_PER_CALL] * (count // IDEAS_PER_CALL)
+    if count % IDEAS_PER_CALL:
+        batch_sizes.append(count % IDEAS_PER_CALL)
+
+    with ThreadPoolExecutor(max_workers=len(batch_sizes)) as executor:
+        batches = list(executor.map(lambda size: request_post_ideas(strategy, size), batch_sizes))
+
+    ideas_df = pd.concat(batches, ignore_index=True)
+
+    # Assign dates to the posts
+    first_date = fetch_latest_date(account)
+    ideas_df["Date"] = [first_date + timedelta(days=POST_SPACING_DAYS * i) for i in range(len(ideas_df))]
 
-    # Convert the JSON idea to a DataFrame
-    idea_df = pd.read_json(idea_json, typ="series").to_frame().T
+    return ideas_df
 
-    # Assign a date to the post
-    idea_df["Date"] = fetch_latest_date()
+# Function to generate a single post idea
+def generate_post_idea(strategy, account):
+    """
+    Generate a single post idea using the provided strategy.
 
-    return idea_df
+    Args:
+        strategy (dict): A dictionary containing the social media strategy.
+        account (dict): Account whose schedule the idea is added to.
+
+    Returns:
+        pd.DataFrame: A dataframe containing the generated post idea.
+    """
+    return generate_post_ideas(strategy, 1, account)
 
 # Function to manually add a post idea in the Streamlit app
-def manually_add_post():
+def manually_add_post(account):
     """
     Allow the user to manually input data for a post idea.
+
+    Args:
+        account (dict): Account the post is added to.
     """
     st.subheader("Manually Add Post")
 
@@ -130,72 +171,117 @@ def manually_add_post():
 
         # Add the post to BigQuery
         try:
-            add_post_to_bigquery(post_df)
+            add_post_to_bigquery(post_df, account)
             st.success("Post successfully added!")
         except Exception as e:
             st.error(f"Failed to add post: {e}")
 
-# Function to add a row to the smp_postideas table in BigQuery
-def add_post_to_bigquery(post_df):
-    """
-    Add a generated post idea to the smp_postideas table in BigQuery.
-
-    Args:
-        post_df (pd.DataFrame): The dataframe containing the post idea to be added.
+# Session state keys for idea changes waiting to be saved and the batch being saved
+QUEUED_CHANGES_KEY = "idea_changes"
+SAVING_CHANGES_KEY = "idea_changes_saving"
+
+
+def queued_changes():
+    # Pending changes keyed by idea id, so repeated edits to one idea coalesce
+    return st.session_state.setdefault(QUEUED_CHANGES_KEY, {})
+
+def queue_delete(idea_id):
+    queued_changes()[idea_id] = {"id": idea_id, "action": "delete"}
+
+def queue_edit(idea_id):
+    # Read the idea's edit form; an edit never revives a queued delete
+    changes = queued_changes()
+    if changes.get(idea_id, {}).get("action") == "delete":
+        return
+    themes = st.session_state[f"edit_themes_{idea_id}"]
+    changes[idea_id] = {
+        "id": idea_id,
+        "action": "update",
+        "date": st.session_state[f"edit_date_{idea_id}"],
+        "caption": st.session_state[f"edit_caption_{idea_id}"],
+        "post_type": st.session_state[f"edit_post_type_{idea_id}"],
+        "themes": [theme.strip() for theme in themes.split(",") if theme.strip()],
+        "tone": st.session_state[f"edit_tone_{idea_id}"],
+    }
+
+def save_idea_changes(account):
     """
-    table_id = "bizbuddydemo-v1.strategy_data.smp_postideas"
-
-    # Convert list-type columns to JSON-serializable strings
-    for column in post_df.columns:
-        if post_df[column].apply(lambda x: isinstance(x, list)).any():
-            post_df[column] = post_df[column].apply(json.dumps)
+    Save queued changes in the background, one MERGE per batch.
 
-    # Insert the DataFrame row directly into BigQuery
-    job = bq_client.load_table_from_dataframe(post_df, table_id)
-    job.result()  # Wait for the load job to complete
+    Only one batch is in flight at a time; changes queued meanwhile are sent
+    together on a later rerun. A failed batch is queued again.
 
-    if job.errors:
-        raise Exception(f"Failed to insert row into BigQuery: {job.errors}")
-
-# Function to delete a post idea from BigQuery
-def delete_post_by_caption(caption):
-    """
-    Delete a post idea from the smp_postideas table based on the caption.
-
-    Args:
-        caption (str): The caption of the post to delete.
-    """
-    query = f"""
-        DELETE FROM `bizbuddydemo-v1.strategy_data.smp_postideas`
-        WHERE caption = @caption
-    """
-    query_job = bq_client.query(query, job_config=bigquery.QueryJobConfig(
-        query_parameters=[
-            bigquery.ScalarQueryParameter("caption", "STRING", caption)
-        ]
-    ))
-    query_job.result()  # Wait for the query to complete
-
-
-def fetch_post_data():
-    """Fetch post data from BigQuery."""
-    query = f"""
-        SELECT date, caption, post_type, themes, tone, source
-        FROM `{PROJECT_ID}.{ACCOUNT_DATASET_ID}.{IDEAS_TABLE_ID}`
-        ORDER BY date ASC
+    Returns:
+        dict: Changes not yet saved, to overlay on the fetched ideas.
     """
-    query_job = bq_client.query(query)
-    return query_job.to_dataframe()
+    saving = st.session_state.get(SAVING_CHANGES_KEY)
+    if saving is not None:
+        future, batch = saving
+        if not future.done():
+            return {**batch, **queued_changes()}
+        del st.session_state[SAVING_CHANGES_KEY]
+        try:
+            future.result()
+        except Exception as e:
+            st.error(f"Failed to save changes, they will be retried: {e}")
+            st.session_state[QUEUED_CHANGES_KEY] = {**batch, **queued_changes()}
+            return queued_changes()
+
+    batch = queued_changes()
+    if batch:
+        st.session_state[QUEUED_CHANGES_KEY] = {}
+        st.session_state[SAVING_CHANGES_KEY] = (submit_write(apply_idea_changes, list(batch.values()), account), batch)
+    return batch
+
+def with_unsaved_ideas(posts, unsaved):
+    # Ideas still in the write buffer are listed as soon as they are added
+    if unsaved.empty:
+        return posts
+    combined = pd.concat([posts, unsaved.reindex(columns=posts.columns)], ignore_index=True)
+    return combined.drop_duplicates(subset="id")
+
+def with_pending_changes(posts, changes):
+    # Show deletes and edits immediately, before the MERGE has finished
+    posts = posts.assign(date=pd.to_datetime(posts["date"]).dt.date)
+    deleted = [idea_id for idea_id, change in changes.items() if change["action"] == "delete"]
+    posts = posts[~posts["id"].isin(deleted)].copy()
+    for idea_id, change in changes.items():
+        if change["action"] == "update":
+            values = {**change, "themes": json.dumps(change["themes"])}
+            posts.loc[posts["id"] == idea_id, list(IDEA_EDIT_COLUMNS)] = [values[name] for name in IDEA_EDIT_COLUMNS]
+    return posts.sort_values(by="date")
+
+def theme_text(themes):
+    # Themes are stored as a JSON list; older rows may hold plain text
+    try:
+        return ", ".join(json.loads(themes))
+    except (TypeError, ValueError):
+        return themes or ""
+
+def render_edit_form(row):
+    idea_id = row["id"]
+    with st.form(f"edit_{idea_id}"):
+        st.date_input("Date", row["date"], key=f"edit_date_{idea_id}")
+        st.text_area("Caption", row["caption"], key=f"edit_caption_{idea_id}")
+        post_types = ["Reel", "Story", "Static Post"]
+        st.selectbox("Post Type", post_types, index=post_types.index(row["post_type"]) if row["post_type"] in post_types else 0,
+                     key=f"edit_post_type_{idea_id}")
+        st.text_area("Themes (comma-separated)", theme_text(row["themes"]), key=f"edit_themes_{idea_id}")
+        st.text_area("Tone", row["tone"], key=f"edit_tone_{idea_id}")
+        st.form_submit_button("Save Edits", on_click=queue_edit, args=(idea_id,))
 
 def main():
+    account = select_account()
+
     st.markdown(
         """<h1 style='text-align: center;'>Post Scheduler and Idea Generator</h1>""",
         unsafe_allow_html=True
     )
 
-    # Add functionality to generate and add a post
-    if st.button("Add AI Generated Post", key="generate_post_id"):
-        with st.spinner("Generating and adding post..."):
+    # Add functionality to generate and add posts
+    idea_count = st.number_input("Number of AI posts to generate", min_value=1, max_value=31, value=1)
+    if st.button("Add AI Generated Posts", key="generate_post_id"):
+        with st.spinner("Generating and adding posts..."):
             # Load strategy data (placeholder example)
             strategy = {
                 "content_plan": [
@@ -211,22 +297,28 @@ def main():
                 "past_posts_summary": """Final Summary: This Instagram account primarily focuses on mental performance coaching in sports, offering insights, strategies, and examples of successful athletes who utilize these techniques. Posts often delve into specific mental strategies like visualization, self-talk, positive affirmations, and maintaining focus on the present moment or process rather than the outcome. The account also emphasizes the importance of resilience, confidence, body language, and optimal arousal levels for peak performance. The strategists also discuss the value of reframing negative experiences as learning opportunities and the role of good sleep habits in cognitive function. Teamwork in sports is frequently highlighted, with a focus on football and volleyball. Engagement with followers is encouraged through calls to action, such as following the page or sending direct messages for additional information or inquiries about one-on-one coaching sessions."""
             }
 
-            # Generate a post idea
-            post_df = generate_post_idea(strategy)
+            # Generate the post ideas
+            post_df = generate_post_ideas(strategy, int(idea_count), account)
 
-            # Add the post to BigQuery
-            add_post_to_bigquery(post_df)
+            # Add all posts to BigQuery in one load job
+            add_post_to_bigquery(post_df, account)
 
-        st.success("Post successfully added!")
+        st.success(f"{len(post_df)} post(s) successfully added!")
 
     with st.expander("Manually Add a Post:"):
-        manually_add_post()
+        manually_add_post(account)
 
-    # Fetch data from BigQuery
-    posts = fetch_post_data()
+    # Fetch data from BigQuery, with ideas and changes that are still being saved
+    pending = save_idea_changes(account)
+    unsaved, write_error = pending_post_ideas(account)
+    posts = with_pending_changes(with_unsaved_ideas(fetch_post_ideas(account), unsaved), pending)
 
     # Display posts
     st.subheader("Upcoming Posts")
+    if write_error:
+        st.warning(f"Some posts are not saved yet and will be retried: {write_error}")
+    if pending or not unsaved.empty:
+        st.caption(f"Saving {len(unsaved)} new post(s) and {len(pending)} change(s)...")
 
     for index, row in posts.iterrows():
         with st.expander(f"{row['date']}, {row['post_type']}: {row['caption'][:50]}..."):
@@ -236,13 +328,11 @@ def main():
             st.markdown(f"**Themes:** {row['themes']}")
             st.markdown(f"**Tone:** {row['tone']}")
             st.markdown(f"**Source:** {row['source']}")
-            
-            if st.button("Delete Post", key=f"delete_{index}"):
-                try:
-                    delete_post_by_caption(row['caption'])
-                    st.success("Post successfully deleted! Refresh the page to see updates.")
-                except Exception as e:
-                    st.error(f"Failed to delete post: {e}")
+
+            with st.popover("Edit Post"):
+                render_edit_form(row)
+            st.button("Delete Post", key=f"delete_{row['id']}", on_click=queue_delete, args=(row['id'],))
 
 if __name__ == "__main__":
     main()
+    render_debug_panel()
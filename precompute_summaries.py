@@ -0,0 +1,157 @@
+"""
+Precompute the Overview page's AI performance summaries.
+
+Run nightly, outside Streamlit, so the page only reads finished summaries:
+
+    python precompute_summaries.py [--window 7] [--max-concurrency 4] [--requests-per-minute 60]
+"""
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pandas as pd
+
+from analytics import (
+    build_daily_metrics,
+    calculate_percentage_diff_df,
+    generate_ig_metrics_windows,
+    generate_static_summary,
+)
+from data_access import (
+    ACCOUNTS,
+    add_summaries_to_bigquery,
+    load_tables_for_accounts,
+    pull_busdescription,
+    table_ref,
+)
+from llm import LLMGateway
+
+SUMMARY_MODEL = "gpt-4o-mini"
+
+# Comparison window the summaries describe, matching the page's default
+DEFAULT_WINDOW_DAYS = 7
+
+# Model calls in flight at once and started per minute
+DEFAULT_MAX_CONCURRENCY = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+
+def generate_gpt_summary(gateway, static_summary, business_description):
+    """
+    Generate a short performance summary using ChatGPT.
+
+    Args:
+        gateway (LLMGateway): Rate-limited model access.
+        static_summary (str): Output of generate_static_summary.
+        business_description (str): The account's business context.
+
+    Returns:
+        str: Two bullet points, as split by the Overview page.
+    """
+    prompt = (
+        f"Here is the business context: {business_description}\n"
+        f"Here is a summary of recent performance: {static_summary}\n"
+        "Generate a concise two-sentence summary of the recent performance. Return this summary in bullets. The first sentence should describe overal perfromance and the next should be a set of suggestions centered around the idea that more posts will enhance the account and its engagement."
+    )
+
+    response = gateway.chat_completion(
+        model=SUMMARY_MODEL,
+        messages=[
+            {
+                "role": "system",
+                "content": "You are a social media manager specializing in providing actionable performance summaries. Use the summary of last weeks performance compared to the previous weeks performance."
+            },
+            {"role": "user", "content": prompt}
+        ]
+    )
+    return response.choices[0].message.content.strip()
+
+
+def build_static_summaries(accounts, window_days):
+    """
+    Compute the period-over-period summary text for every account.
+
+    Account and post tables are loaded for all accounts up front, with one
+    query per table when the accounts share it.
+
+    Returns:
+        dict: Static summaries keyed by PAGE_ID.
+    """
+    account_tables = load_tables_for_accounts(accounts, "ACCOUNT_TABLE_ID")
+    post_tables = load_tables_for_accounts(accounts, "POST_TABLE_ID")
+
+    summaries = {}
+    for account in accounts:
+        page_id = account["PAGE_ID"]
+        daily_metrics = build_daily_metrics(account_tables[page_id], post_tables[page_id])
+        current_df, previous_df = generate_ig_metrics_windows([window_days], daily_metrics)
+        perdiff = calculate_percentage_diff_df(current_df, previous_df)
+        summaries[page_id] = generate_static_summary(
+            current_df.reset_index(drop=True), perdiff.reset_index(drop=True)
+        )
+    return summaries
+
+
+def precompute_summaries(accounts, window_days, max_concurrency, requests_per_minute):
+    """
+    Summarize every account with the model and bulk-load the results.
+
+    Accounts whose model call fails are reported and skipped, so the page keeps
+    showing their previous summary.
+
+    Returns:
+        pd.DataFrame: The rows written, one per summarized account.
+    """
+    static_summaries = build_static_summaries(accounts, window_days)
+    # A burst of 1 keeps the starts evenly spaced
+    gateway = LLMGateway(max_concurrency=max_concurrency, requests_per_minute=requests_per_minute, burst=1)
+
+    def summarize(account):
+        business_description = pull_busdescription(account)
+        return generate_gpt_summary(gateway, static_summaries[account["PAGE_ID"]], business_description)
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        futures = {account["PAGE_ID"]: executor.submit(summarize, account) for account in accounts}
+
+    rows = []
+    for account in accounts:
+        page_id = account["PAGE_ID"]
+        try:
+            summary = futures[page_id].result()
+        except Exception as e:
+            print(f"Error generating summary for {account['ACCOUNT_NAME']}: {e}", file=sys.stderr)
+            continue
+        rows.append({"page_id": page_id, "summary": summary, "date": date.today(), "ref": table_ref(account, "SUMMARY_TABLE_ID")})
+
+    summary_df = pd.DataFrame(rows, columns=["page_id", "summary", "date", "ref"])
+
+    # One load job per summary table; a single job when the accounts share it
+    for ref, group in summary_df.groupby("ref"):
+        account = next(account for account in accounts if table_ref(account, "SUMMARY_TABLE_ID") == ref)
+        add_summaries_to_bigquery(group.drop(columns="ref").reset_index(drop=True), account)
+
+    return summary_df.drop(columns="ref")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--account", action="append", dest="page_ids", metavar="PAGE_ID",
+                        help="Only summarize this account (repeatable). Defaults to every account.")
+    parser.add_argument("--window", type=int, default=DEFAULT_WINDOW_DAYS,
+                        help="Days in the compared period.")
+    parser.add_argument("--max-concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY)
+    parser.add_argument("--requests-per-minute", type=float, default=DEFAULT_REQUESTS_PER_MINUTE)
+    args = parser.parse_args(argv)
+
+    accounts = [account for account in ACCOUNTS if not args.page_ids or account["PAGE_ID"] in args.page_ids]
+    if not accounts:
+        parser.error("No configured account matches --account.")
+
+    summary_df = precompute_summaries(accounts, args.window, args.max_concurrency, args.requests_per_minute)
+    print(f"Wrote {len(summary_df)} of {len(accounts)} summaries.")
+    return 0 if len(summary_df) == len(accounts) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+"""
+Refresh the daily rollup table the Overview page reads.
+
+Run nightly, after the post and account tables are loaded:
+
+    python refresh_rollup.py [--account PAGE_ID] [--full]
+"""
+import argparse
+import sys
+
+from data_access import ACCOUNTS, refresh_daily_rollup
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--account", action="append", dest="page_ids", metavar="PAGE_ID",
+                        help="Only refresh this account (repeatable). Defaults to every account.")
+    parser.add_argument("--full", action="store_true",
+                        help="Recompute all history instead of only the most recent days.")
+    args = parser.parse_args(argv)
+
+    accounts = [account for account in ACCOUNTS if not args.page_ids or account["PAGE_ID"] in args.page_ids]
+    if not accounts:
+        parser.error("No configured account matches --account.")
+
+    failures = 0
+    for account in accounts:
+        try:
+            since = refresh_daily_rollup(account, full=args.full)
+        except Exception as e:
+            print(f"Error refreshing the rollup for {account['ACCOUNT_NAME']}: {e}", file=sys.stderr)
+            failures += 1
+            continue
+        print(f"{account['ACCOUNT_NAME']}: refreshed {'all days' if since is None else f'days since {since}'}.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
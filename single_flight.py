@@ -0,0 +1,49 @@
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Share one execution of a call among concurrent callers with the same key.
+
+    The first caller for a key runs the call; callers that arrive while it
+    is in flight wait for it and receive the same result or exception.
+    Nothing is kept once the call finishes, so this complements caches
+    rather than replacing them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def do(self, key, fn):
+        """
+        Run `fn()` once for every concurrent caller passing an equal `key`.
+
+        Args:
+            key (hashable): Identifies the call, e.g. query text and parameters.
+            fn (callable): The call to run.
+
+        Returns:
+            tuple: fn's result and whether it was shared with an earlier caller.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+
+        if not leader:
+            return future.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._in_flight[key]
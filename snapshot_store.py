@@ -0,0 +1,102 @@
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Local directory holding one Parquet snapshot per BigQuery table
+SNAPSHOT_DIR = ".snapshots"
+
+
+def snapshot_path(table_ref):
+    """Return the Parquet file used for a `project.dataset.table` reference."""
+    return os.path.join(SNAPSHOT_DIR, f"{table_ref}.parquet")
+
+
+def load_snapshot(table_ref, columns=None):
+    """
+    Load a table snapshot, memory-mapping the Parquet file.
+
+    Args:
+        table_ref (str): Fully qualified table reference.
+        columns (list[str], optional): Only read these columns.
+
+    Returns:
+        pd.DataFrame: The snapshot, or None if none has been saved yet.
+    """
+    path = snapshot_path(table_ref)
+    if not os.path.exists(path):
+        return None
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def snapshot_version(table_ref):
+    """
+    Return a token that changes whenever a table's snapshot is replaced.
+
+    Returns:
+        int: The file's modification time in nanoseconds, or None if there is no snapshot.
+    """
+    try:
+        return os.stat(snapshot_path(table_ref)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def save_snapshot(table_ref, df):
+    """
+    Atomically replace the snapshot for a table.
+
+    Args:
+        table_ref (str): Fully qualified table reference.
+        df (pd.DataFrame): Full table contents to store.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    path = snapshot_path(table_ref)
+    # A unique temporary file per call, so concurrent saves never share one
+    fd, tmp_path = tempfile.mkstemp(dir=SNAPSHOT_DIR, prefix=f"{table_ref}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def snapshot_watermark(snapshot, watermark_column):
+    """
+    Return the latest date present in a snapshot.
+
+    Args:
+        snapshot (pd.DataFrame): A loaded snapshot, possibly None or empty.
+        watermark_column (str): Date or timestamp column tracking new rows.
+
+    Returns:
+        date: The high-water mark, or None when there is nothing to resume from.
+    """
+    if snapshot is None or snapshot.empty or watermark_column not in snapshot:
+        return None
+    watermark = pd.to_datetime(snapshot[watermark_column]).max()
+    return None if pd.isna(watermark) else watermark.date()
+
+
+def merge_snapshot(snapshot, fresh, watermark_column, since):
+    """
+    Replace every snapshot row on or after `since` with freshly pulled rows.
+
+    Args:
+        snapshot (pd.DataFrame): The stored snapshot.
+        fresh (pd.DataFrame): Rows pulled from BigQuery for dates >= since.
+        watermark_column (str): Date or timestamp column tracking new rows.
+        since (date): First day covered by `fresh`.
+
+    Returns:
+        pd.DataFrame: The updated snapshot.
+    """
+    row_dates = pd.to_datetime(snapshot[watermark_column]).dt.date
+    kept = snapshot[row_dates < since]
+    if fresh.empty:
+        return kept.reset_index(drop=True)
+    return pd.concat([kept, fresh], ignore_index=True)
@@ -0,0 +1,76 @@
+import pandas as pd
+from pandas.api import types
+
+# Repeated string columns stored as categoricals...
+CATEGORY_COLUMNS = ["media_type", "post_type", "tone", "source", "page_id"]
+
+# ...when each distinct value appears at least twice on average; the post
+# table's `source` is a unique media URL and stays a plain string there
+CATEGORY_MAX_UNIQUE_RATIO = 0.5
+
+# Date and timestamp columns kept as datetime64 rather than Python objects
+DATE_COLUMNS = ["date", "Date", "created_time"]
+
+# Long text left out of cached frames and read only for the rows displayed
+TEXT_COLUMNS = ["caption"]
+
+# Narrowest integer type used for metrics; window sums and arithmetic
+# between metrics stay well clear of its range
+INT32_MIN, INT32_MAX = -(2 ** 31), 2 ** 31 - 1
+
+
+def _compact_integers(column):
+    if column.empty or column.min() < INT32_MIN or column.max() > INT32_MAX:
+        return column
+    # Nullable BigQuery integers keep their missing values
+    return column.astype("Int32" if isinstance(column.dtype, pd.Int64Dtype) else "int32")
+
+
+def compact_column(name, column):
+    """
+    Return `column` in the most compact dtype that keeps its values.
+
+    Args:
+        name (str): Column name, checked against DATE_COLUMNS and CATEGORY_COLUMNS.
+        column (pd.Series): Column as returned by BigQuery.
+
+    Returns:
+        pd.Series: The converted column, or `column` unchanged.
+    """
+    if name in DATE_COLUMNS and not types.is_datetime64_any_dtype(column):
+        return pd.to_datetime(column)
+    if name in CATEGORY_COLUMNS and (types.is_object_dtype(column) or types.is_string_dtype(column)):
+        if column.nunique() <= len(column) * CATEGORY_MAX_UNIQUE_RATIO:
+            return column.astype("category")
+        return column
+    if types.is_bool_dtype(column):
+        return column
+    if types.is_integer_dtype(column):
+        return _compact_integers(column)
+    if types.is_float_dtype(column):
+        return column.astype("float32")
+    return column
+
+
+def compact_frame(df, text_columns=TEXT_COLUMNS):
+    """
+    Convert a post or account table to its compact in-memory layout.
+
+    Metrics are downcast to 32-bit, repeated strings become categoricals,
+    dates become datetime64 and long text columns are dropped; read them
+    back with data_access.fetch_captions for the rows being shown.
+
+    Args:
+        df (pd.DataFrame): Table as returned by BigQuery or a snapshot.
+        text_columns (list[str]): Columns to leave out.
+
+    Returns:
+        pd.DataFrame: A new, compact frame with the same index.
+    """
+    df = df.drop(columns=[name for name in text_columns if name in df])
+    return pd.DataFrame({name: compact_column(name, df[name]) for name in df.columns}, index=df.index)
+
+
+def frame_memory(df):
+    """Bytes held by a frame, including the strings it references."""
+    return int(df.memory_usage(deep=True).sum()) if df is not None else 0
@@ -0,0 +1,205 @@
+import atexit
+import sys
+import threading
+import time
+
+import pandas as pd
+
+# A table's buffered rows are written once there are this many...
+FLUSH_MAX_ROWS = 500
+
+# ...or once the oldest of them has waited this long
+FLUSH_MAX_DELAY_SECONDS = 5
+
+# Delay before retrying a failed write, doubled on each consecutive failure
+RETRY_BACKOFF_SECONDS = 2
+RETRY_MAX_BACKOFF_SECONDS = 120
+
+# How long interpreter shutdown waits for buffered rows to be written
+EXIT_FLUSH_TIMEOUT_SECONDS = 30
+
+
+class WriteBuffer:
+    """
+    Coalesce appended rows per table and write them in bulk in the background.
+
+    A worker thread decides when a table is due and hands `write_now(table)`
+    to `submit`, which runs it (typically on a single writer thread, so
+    buffered writes are ordered with other DML). Failed writes keep their
+    rows and are retried with exponential backoff. Rows still buffered at
+    interpreter exit are written by the exiting thread itself, since
+    `submit` can no longer schedule work by then.
+
+    Args:
+        write (callable): write(table, rows) appends a DataFrame to a table.
+        submit (callable): submit(fn, *args) runs fn asynchronously.
+    """
+
+    def __init__(self, write, submit, max_rows=FLUSH_MAX_ROWS, max_delay=FLUSH_MAX_DELAY_SECONDS):
+        self.write = write
+        self.submit = submit
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+
+        # Per table: frames waiting to be written, when the oldest arrived, and frames being written
+        self._pending = {}
+        self._first_added = {}
+        self._writing = {}
+        self._scheduled = set()
+        self._retry_at = {}
+        self._failures = {}
+        self._flush_requested = False
+        self._closed = False
+
+        # Per table: message of the last failed write, cleared once a write succeeds
+        self.errors = {}
+
+        self._condition = threading.Condition()
+        threading.Thread(target=self._run, name="write-buffer", daemon=True).start()
+        atexit.register(self.close, EXIT_FLUSH_TIMEOUT_SECONDS)
+
+    def add(self, table, rows):
+        """Queue rows to be appended to `table`; returns immediately."""
+        with self._condition:
+            self._pending.setdefault(table, []).append(rows)
+            self._first_added.setdefault(table, time.monotonic())
+            self._condition.notify_all()
+
+    def pending(self, table):
+        """
+        Rows added to `table` that are not yet written.
+
+        Returns:
+            pd.DataFrame: Buffered and in-flight rows, empty if there are none.
+        """
+        with self._condition:
+            frames = self._writing.get(table, []) + self._pending.get(table, [])
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    def write_now(self, table):
+        """
+        Write everything buffered for `table` in the calling thread.
+
+        Called by the worker through `submit`, and by other writes on the
+        writer thread that must see buffered rows first.
+        """
+        with self._condition:
+            self._scheduled.discard(table)
+            batch = self._pending.pop(table, [])
+            self._first_added.pop(table, None)
+            if not batch:
+                return
+            self._writing[table] = batch
+
+        try:
+            self.write(table, pd.concat(batch, ignore_index=True))
+        except Exception as e:
+            with self._condition:
+                # Put the rows back ahead of anything added meanwhile
+                self._pending[table] = batch + self._pending.get(table, [])
+                self._first_added[table] = time.monotonic()
+                failures = self._failures.get(table, 0) + 1
+                self._failures[table] = failures
+                backoff = min(RETRY_BACKOFF_SECONDS * 2 ** (failures - 1), RETRY_MAX_BACKOFF_SECONDS)
+                self._retry_at[table] = time.monotonic() + backoff
+                self.errors[table] = str(e)
+            raise
+        else:
+            with self._condition:
+                self._failures.pop(table, None)
+                self._retry_at.pop(table, None)
+                self.errors.pop(table, None)
+        finally:
+            with self._condition:
+                self._writing.pop(table, None)
+                self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Write every buffered row now and wait until done.
+
+        Returns:
+            bool: True if nothing is left buffered when this returns.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            while self._pending or self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            self._flush_requested = False
+            return not (self._pending or self._writing)
+
+    def close(self, timeout=None):
+        """
+        Stop writing in the background and write every buffered row here.
+
+        Registered to run at interpreter exit, after executors have shut
+        down. Failed writes are retried with backoff until `timeout`.
+
+        Returns:
+            bool: True if nothing is left buffered when this returns.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+            # Writes already handed to `submit` finish on their own thread
+            while self._writing:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+        while True:
+            with self._condition:
+                tables = [table for table in self._pending if table not in self._writing]
+                retry_at = max((self._retry_at.get(table, 0) for table in tables), default=0)
+            if not tables or (deadline is not None and retry_at > deadline):
+                break
+            time.sleep(max(retry_at - time.monotonic(), 0))
+            for table in tables:
+                try:
+                    self.write_now(table)
+                except Exception:
+                    pass  # Kept buffered with a backoff, retried on the next pass
+
+        with self._condition:
+            for table, frames in self._pending.items():
+                rows = sum(len(frame) for frame in frames)
+                print(f"{rows} buffered rows for {table} were not written: {self.errors.get(table)}", file=sys.stderr)
+            return not (self._pending or self._writing)
+
+    def _due_at(self, table, now):
+        rows = sum(len(frame) for frame in self._pending[table])
+        due = now if rows >= self.max_rows or self._flush_requested else self._first_added[table] + self.max_delay
+        return max(due, self._retry_at.get(table, 0))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                waiting = {
+                    table: self._due_at(table, now) for table in self._pending
+                    if table not in self._scheduled and table not in self._writing
+                }
+                due = [table for table, due_at in waiting.items() if due_at <= now]
+                if not due:
+                    timeout = min(waiting.values()) - now if waiting else None
+                    self._condition.wait(timeout)
+                    continue
+                self._scheduled.update(due)
+
+            for table in due:
+                try:
+                    self.submit(self.write_now, table)
+                except RuntimeError:
+                    # The executor has shut down for interpreter exit; close() writes the rest
+                    with self._condition:
+                        self._scheduled.difference_update(due)
+                    return